@@ -0,0 +1,47 @@
+"""Плагин проверки бюджетов производительности.
+
+Тест, запрашивающий фикстуру budget_url_name, запускается для каждого
+URL из файла бюджетов; превышение выводится таблицей «измерено / бюджет».
+"""
+import pytest
+
+
+def pytest_generate_tests(metafunc):
+    if 'budget_url_name' in metafunc.fixturenames:
+        from core.budgets import load_budgets
+        metafunc.parametrize('budget_url_name', sorted(load_budgets()))
+
+
+@pytest.fixture
+def budgets():
+    from core.budgets import load_budgets
+    return load_budgets()
+
+
+@pytest.fixture
+def budget_fixture(db, settings, tmp_path):
+    from core.budgets import create_fixture
+    settings.METRICS_DIR = str(tmp_path)
+    settings.THROTTLE_RATES = {
+        scope: {'user': '10000/min', 'ip': '10000/min'}
+        for scope in settings.THROTTLE_RATES
+    }
+    return create_fixture()
+
+
+@pytest.fixture
+def measure_budget(client, budget_fixture):
+    from core.budgets import measure, requests_for
+
+    def measure_url(url_name):
+        method, path, data, user = requests_for(budget_fixture)[url_name]
+        if user is not None:
+            client.force_login(user)
+        return measure(client, method, path, data)
+    return measure_url
+
+
+def check_budget(url_name, measured, budget):
+    from core.budgets import exceeded, format_diff
+    if exceeded(measured, budget):
+        pytest.fail(format_diff(url_name, measured, budget), pytrace=False)
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """Картинки и миниатюры тестов пишутся во временный каталог."""
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
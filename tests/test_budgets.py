@@ -0,0 +1,18 @@
+from core.budgets import url_names
+from tests.fixtures.fixture_budgets import check_budget
+
+
+def test_every_url_has_budget(budgets):
+    missing = sorted(set(url_names()) - set(budgets))
+    assert not missing, (
+        f'Для URL {", ".join(missing)} не задан бюджет '
+        f'в `performance_budgets.json`'
+    )
+
+
+def test_view_within_budget(budget_url_name, budgets, measure_budget):
+    measured = measure_budget(budget_url_name)
+    assert measured['status'] < 400, (
+        f'`{budget_url_name}` вернул статус {measured["status"]}'
+    )
+    check_budget(budget_url_name, measured, budgets[budget_url_name])
@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'task', 'status', 'priority', 'attempts',
+                    'run_at', 'locked_by')
+    list_filter = ('status', 'task')
+    readonly_fields = ('last_error',)
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,154 @@
+"""Бюджеты производительности для каждого URL на стандартном наборе данных.
+
+Бюджеты лежат в settings.PERFORMANCE_BUDGET_FILE:
+
+    {"posts:index": {"queries": 8, "bytes": 40000, "render_ms": 150}, ...}
+
+queries — число SQL-запросов, bytes — размер ответа, render_ms — время
+рендеринга шаблонов. Проверка запускается pytest-плагином
+tests/fixtures/fixture_budgets.py.
+"""
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import get_resolver, reverse
+
+from posts.benchmark import response_size
+from posts.models import Comment, Follow, Group, Post, TrendingScore
+from . import timing
+
+User = get_user_model()
+
+NAMESPACES = ('posts', 'users', 'about')
+CORE_URL_NAMES = ('load_status', 'metrics')
+LIMITS = ('queries', 'bytes', 'render_ms')
+FIXTURE_POSTS = 15
+FIXTURE_COMMENTS = 5
+
+
+def load_budgets(path=None):
+    with open(path or settings.PERFORMANCE_BUDGET_FILE,
+              encoding='utf-8') as budget_file:
+        return json.load(budget_file)
+
+
+def url_names():
+    """Имена всех URL приложений posts, users, about и core."""
+    resolver = get_resolver()
+    names = set(CORE_URL_NAMES)
+    for namespace in NAMESPACES:
+        _, namespace_resolver = resolver.namespace_dict[namespace]
+        names.update(
+            f'{namespace}:{pattern.name}'
+            for pattern in namespace_resolver.url_patterns if pattern.name)
+    return sorted(names)
+
+
+def create_fixture():
+    """Стандартный набор: автор с постами в группе и подписанный читатель."""
+    author = User.objects.create_user(username='budget_author')
+    reader = User.objects.create_user(username='budget_reader')
+    group = Group.objects.create(
+        title='Группа', slug='budget-group', description='Описание')
+    Post.objects.bulk_create(
+        [Post(author=author, group=group, text=f'Пост {number} ' * 20)
+         for number in range(FIXTURE_POSTS)])
+    post = Post.objects.filter(author=author).latest('pub_date')
+    Comment.objects.bulk_create(
+        [Comment(post=post, author=reader, text=f'Комментарий {number}')
+         for number in range(FIXTURE_COMMENTS)])
+    Follow.objects.create(user=reader, author=author)
+    TrendingScore.objects.bulk_create(
+        [TrendingScore(kind=TrendingScore.POST, object_id=pk, score=number)
+         for number, pk in enumerate(Post.objects.values_list('pk',
+                                                              flat=True))]
+        + [TrendingScore(kind=TrendingScore.GROUP, object_id=group.pk,
+                         score=0)])
+    return {'author': author, 'reader': reader, 'group': group, 'post': post}
+
+
+def requests_for(fixture):
+    """(метод, путь, данные, пользователь) для каждого имени URL."""
+    author, reader = fixture['author'], fixture['reader']
+    post_id = fixture['post'].pk
+    return {
+        'posts:index': ('get', reverse('posts:index'), None, None),
+        'posts:index_feed': ('get', reverse(
+            'posts:index_feed', args=['rss']), None, None),
+        'posts:group_feed': ('get', reverse(
+            'posts:group_feed', args=[fixture['group'].slug, 'atom']),
+            None, None),
+        'posts:profile_feed': ('get', reverse(
+            'posts:profile_feed', args=[author.username, 'rss']), None, None),
+        'posts:group_list': ('get', reverse(
+            'posts:group_list', args=[fixture['group'].slug]), None, None),
+        'posts:profile': ('get', reverse(
+            'posts:profile', args=[author.username]), None, reader),
+        'posts:post_detail': ('get', reverse(
+            'posts:post_detail', args=[post_id]), None, None),
+        'posts:post_user_state': ('get', reverse(
+            'posts:post_user_state', args=[post_id]), None, author),
+        'posts:post_create': ('get', reverse('posts:post_create'),
+                              None, author),
+        'posts:post_edit': ('get', reverse('posts:post_edit', args=[post_id]),
+                            None, author),
+        'posts:add_comment': ('post', reverse(
+            'posts:add_comment', args=[post_id]),
+            {'text': 'Комментарий'}, reader),
+        'posts:trending': ('get', reverse('posts:trending'), None, None),
+        'posts:follow_index': ('get', reverse('posts:follow_index'),
+                               None, reader),
+        'posts:profile_follow_batch': ('post', reverse(
+            'posts:profile_follow_batch'),
+            {'username': [author.username]}, reader),
+        'posts:profile_follow': ('get', reverse(
+            'posts:profile_follow', args=[author.username]), None, reader),
+        'posts:profile_unfollow': ('get', reverse(
+            'posts:profile_unfollow', args=[author.username]), None, reader),
+        'posts:profile_export': ('get', reverse(
+            'posts:profile_export', args=[author.username]), None, author),
+        'users:login': ('get', reverse('users:login'), None, None),
+        'users:signup': ('get', reverse('users:signup'), None, None),
+        'users:logout': ('get', reverse('users:logout'), None, reader),
+        'users:password_reset': ('get', reverse('users:password_reset'),
+                                 None, None),
+        'about:author': ('get', reverse('about:author'), None, None),
+        'about:tech': ('get', reverse('about:tech'), None, None),
+        'load_status': ('get', reverse('load_status'), None, None),
+        'metrics': ('get', reverse('metrics'), None, None),
+    }
+
+
+def measure(client, method, path, data=None):
+    """Число запросов, размер ответа и время рендеринга одного запроса."""
+    timing.install()
+    cache.clear()
+    with timing.collect() as timings:
+        response = getattr(client, method)(path, data)
+        size = response_size(response)
+    return {
+        'status': response.status_code,
+        'queries': timings.queries,
+        'bytes': size,
+        'render_ms': round(timings.render_ms, 1),
+    }
+
+
+def exceeded(measured, budget):
+    """Ограничения из budget, которые measured превышает."""
+    return [limit for limit in LIMITS
+            if limit in budget and measured[limit] > budget[limit]]
+
+
+def format_diff(url_name, measured, budget):
+    lines = [f'{url_name}: бюджет превышен']
+    for limit in LIMITS:
+        if limit not in budget:
+            continue
+        over = measured[limit] - budget[limit]
+        marker = f'+{over:g}' if over > 0 else 'ok'
+        lines.append(f'  {limit:<10}{measured[limit]:>10g} / '
+                     f'{budget[limit]:<10g}{marker}')
+    return '\n'.join(lines)
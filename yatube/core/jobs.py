@@ -0,0 +1,259 @@
+"""Очередь фоновых задач в БД без внешнего брокера.
+
+Задачи регистрируются декоратором @task в модулях <app>/tasks.py и
+ставятся в очередь одним INSERT через enqueue(). Обработчик
+(manage.py run_jobs) забирает задачу условным UPDATE ... WHERE
+status = 'queued', поэтому потоки и процессы не выполнят одну задачу
+дважды. Упавшая задача возвращается в очередь с экспоненциальной
+задержкой, после max_attempts попыток остаётся со статусом failed.
+Пока задача выполняется, обработчик обновляет её heartbeat_at; задачи
+без свежей отметки обработчики периодически возвращают в очередь.
+"""
+import json
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (DatabaseError, OperationalError,
+                       close_old_connections, connections)
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('yatube.jobs')
+
+HIGH_PRIORITY = 10
+CLAIM_CANDIDATES = 10
+DB_RETRIES = 5
+DB_RETRY_DELAY = 0.05
+
+registry = {}
+
+
+def task(name, max_attempts=5, priority=0):
+    """Регистрирует функцию как фоновую задачу с именем name."""
+    def decorator(func):
+        registry[name] = func
+        func.job_defaults = {'max_attempts': max_attempts,
+                             'priority': priority}
+        return func
+    return decorator
+
+
+def enqueue(name, *, priority=None, delay=0, **kwargs):
+    """Ставит задачу в очередь; kwargs должны сериализоваться в JSON."""
+    defaults = getattr(registry.get(name), 'job_defaults', {})
+    return Job.objects.create(
+        task=name,
+        payload=json.dumps(kwargs),
+        priority=(priority if priority is not None
+                  else defaults.get('priority', 0)),
+        max_attempts=defaults.get('max_attempts', 5),
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка со случайным разбросом до 50%."""
+    delay = min(settings.JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+                settings.JOB_RETRY_MAX_DELAY)
+    return delay * random.uniform(1, 1.5)
+
+
+def retry_on_lock(func, *args, **kwargs):
+    """Повторяет запись, если SQLite ответил «database is locked»."""
+    for attempt in range(DB_RETRIES):
+        try:
+            return func(*args, **kwargs)
+        except OperationalError:
+            if attempt == DB_RETRIES - 1:
+                raise
+            time.sleep(DB_RETRY_DELAY * 2 ** attempt)
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, чей обработчик перестал отмечаться."""
+    deadline = timezone.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    return Job.objects.filter(
+        status=Job.RUNNING, heartbeat_at__lt=deadline
+    ).update(status=Job.QUEUED, locked_at=None, locked_by='',
+             heartbeat_at=None)
+
+
+def claim(worker_id):
+    """Забирает самую приоритетную готовую задачу или возвращает None."""
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now
+    ).order_by('-priority', 'run_at', 'pk')[:CLAIM_CANDIDATES]
+    for job in candidates:
+        claimed = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_at=now, locked_by=worker_id,
+            heartbeat_at=now, attempts=F('attempts') + 1)
+        if claimed:
+            job.status = Job.RUNNING
+            job.locked_at = now
+            job.locked_by = worker_id
+            job.attempts += 1
+            return job
+    return None
+
+
+@contextmanager
+def heartbeat(job):
+    """Раз в JOB_HEARTBEAT_INTERVAL секунд отмечает, что задача жива."""
+    done = threading.Event()
+
+    def beat():
+        try:
+            while not done.wait(settings.JOB_HEARTBEAT_INTERVAL):
+                Job.objects.filter(
+                    pk=job.pk, locked_by=job.locked_by
+                ).update(heartbeat_at=timezone.now())
+        except DatabaseError:
+            logger.exception('Не удалось отметить задачу %s', job)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name=f'heartbeat-{job.pk}',
+                              daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def execute(job):
+    """Выполняет задачу; возвращает True при успехе."""
+    try:
+        func = registry.get(job.task)
+        if func is None:
+            raise LookupError(f'Задача {job.task} не зарегистрирована')
+        with heartbeat(job):
+            func(**json.loads(job.payload))
+    except Exception:
+        logger.exception('Задача %s упала (попытка %d из %d)',
+                         job, job.attempts, job.max_attempts)
+        update = {'locked_at': None, 'locked_by': '', 'heartbeat_at': None,
+                  'last_error': traceback.format_exc()}
+        if job.attempts >= job.max_attempts:
+            update['status'] = Job.FAILED
+        else:
+            update['status'] = Job.QUEUED
+            update['run_at'] = timezone.now() + timedelta(
+                seconds=retry_delay(job.attempts))
+        retry_on_lock(Job.objects.filter(pk=job.pk).update, **update)
+        return False
+    retry_on_lock(Job.objects.filter(pk=job.pk).delete)
+    return True
+
+
+def run_pending(worker_id='inline'):
+    """Выполняет готовые задачи в текущем потоке; возвращает их число."""
+    executed = 0
+    job = retry_on_lock(claim, worker_id)
+    while job is not None:
+        execute(job)
+        executed += 1
+        job = retry_on_lock(claim, worker_id)
+    return executed
+
+
+class Worker:
+    """Пул потоков или процессов, каждый выполняет задачи по одной.
+
+    С burst=True обработчики завершаются, когда готовых задач не осталось.
+    """
+
+    def __init__(self, concurrency=1, processes=False, burst=False,
+                 poll_interval=None):
+        self.concurrency = concurrency
+        self.processes = processes
+        self.burst = burst
+        self.poll_interval = (settings.JOB_POLL_INTERVAL
+                              if poll_interval is None else poll_interval)
+        self.stopping = threading.Event()
+        self.requeue_lock = threading.Lock()
+        self.next_requeue = 0
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def requeue_if_due(self):
+        """Раз в JOB_REQUEUE_INTERVAL секунд возвращает брошенные задачи."""
+        with self.requeue_lock:
+            if time.monotonic() < self.next_requeue:
+                return
+            self.next_requeue = (time.monotonic()
+                                 + settings.JOB_REQUEUE_INTERVAL)
+        retry_on_lock(requeue_stale)
+
+    def loop(self):
+        worker_id = (f'{socket.gethostname()}:{os.getpid()}:'
+                     f'{threading.current_thread().name}')
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                try:
+                    self.requeue_if_due()
+                    job = retry_on_lock(claim, worker_id)
+                    if job is not None:
+                        execute(job)
+                except DatabaseError:
+                    logger.exception('Ошибка БД в обработчике %s', worker_id)
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                if job is None:
+                    if self.burst:
+                        return
+                    self.stopping.wait(self.poll_interval)
+        finally:
+            connections.close_all()
+
+    def run(self):
+        if self.processes:
+            self.run_processes()
+        else:
+            self.run_threads()
+
+    def run_threads(self):
+        threads = [threading.Thread(target=self.loop, name=f'job-{number}')
+                   for number in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_processes(self):
+        connections.close_all()
+        children = []
+        for _ in range(self.concurrency):
+            pid = os.fork()
+            if pid == 0:
+                signal.signal(signal.SIGTERM, self.stop)
+                signal.signal(signal.SIGINT, self.stop)
+                try:
+                    self.loop()
+                finally:
+                    os._exit(0)
+            children.append(pid)
+
+        def forward(signum, frame):
+            for child in children:
+                os.kill(child, signal.SIGTERM)
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        for child in children:
+            os.waitpid(child, 0)
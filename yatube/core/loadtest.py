@@ -0,0 +1,252 @@
+"""Конкурентная нагрузка по HTTP на настоящее WSGI-приложение.
+
+Сценарий — JSON-файл:
+
+    {
+        "virtual_users": 20,
+        "duration": 30,
+        "accounts": ["reader1", "reader2"],
+        "steps": [
+            {"name": "feed", "path": "/", "weight": 5},
+            {"name": "post", "path": "/posts/{post_id}/", "weight": 5},
+            {"name": "comment", "method": "POST", "auth": true,
+             "path": "/posts/{post_id}/comment/",
+             "data": {"text": "Нагрузочный комментарий"}},
+            {"name": "follow", "auth": true,
+             "path": "/profile/{username}/follow/"}
+        ]
+    }
+
+Плейсхолдеры {post_id}, {username} и {slug} заполняются случайными
+существующими постами, авторами и группами. Шаги с "auth" выполняют
+виртуальные пользователи, вошедшие под одним из accounts.
+"""
+import json
+import os
+import random
+import signal
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model)
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connections
+from django.test.utils import override_settings
+
+from posts.benchmark import PERCENTILES, percentile
+from posts.models import Group, Post
+
+User = get_user_model()
+
+SAMPLE_SIZE = 1000
+REQUEST_TIMEOUT = 30
+UNLIMITED_RATE = '1000000/s'
+
+
+def load_scenario(path):
+    with open(path, encoding='utf-8') as scenario_file:
+        scenario = json.load(scenario_file)
+    for step in scenario['steps']:
+        step.setdefault('method', 'GET')
+        step.setdefault('weight', 1)
+        step.setdefault('auth', False)
+        step.setdefault('data', None)
+    return scenario
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Server:
+    """Поднимает yatube.wsgi.application в потоках или в нескольких процессах.
+
+    При processes > 1 один слушающий сокет обслуживают форкнутые процессы,
+    каждый со своим пулом потоков — как prefork-сервер в продакшене.
+    """
+
+    def __init__(self, processes=1, host='127.0.0.1', port=0):
+        from yatube.wsgi import application
+
+        self.httpd = ThreadedWSGIServer((host, port), QuietRequestHandler)
+        self.httpd.set_app(application)
+        self.processes = processes
+        self.children = []
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        if self.processes == 1:
+            self.thread = threading.Thread(
+                target=self.httpd.serve_forever, daemon=True)
+            self.thread.start()
+            return
+        connections.close_all()
+        for _ in range(self.processes):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    self.httpd.serve_forever()
+                finally:
+                    os._exit(0)
+            self.children.append(pid)
+
+    def stop(self):
+        if self.thread is not None:
+            self.httpd.shutdown()
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+        self.httpd.server_close()
+
+
+def unthrottled():
+    """Снимает лимиты THROTTLE_RATES на время прогона.
+
+    Все виртуальные пользователи ходят с 127.0.0.1 под несколькими
+    аккаунтами, поэтому с рабочими лимитами прогон мерил бы ответы 429
+    общего бакета, а не пропускную способность сервера.
+    """
+    return override_settings(THROTTLE_RATES={
+        scope: {bucket: UNLIMITED_RATE for bucket in rates}
+        for scope, rates in settings.THROTTLE_RATES.items()
+    })
+
+
+def make_session(username):
+    """Сессия вошедшего пользователя без проверки пароля."""
+    user = User.objects.get(username=username)
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return session.session_key
+
+
+def sample_placeholders():
+    return {
+        'post_id': list(Post.objects.order_by('?').values_list(
+            'pk', flat=True)[:SAMPLE_SIZE]),
+        'username': list(User.objects.filter(posts__isnull=False).distinct(
+        ).order_by('?').values_list('username', flat=True)[:SAMPLE_SIZE]),
+        'slug': list(Group.objects.order_by('?').values_list(
+            'slug', flat=True)[:SAMPLE_SIZE]),
+    }
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, base_url, steps, placeholders, session_key, deadline,
+                 results, seed):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.steps = steps
+        self.weights = [step['weight'] for step in steps]
+        self.placeholders = placeholders
+        self.deadline = deadline
+        self.results = results
+        self.rng = random.Random(seed)
+        self.http = requests.Session()
+        if session_key:
+            self.http.cookies.set(settings.SESSION_COOKIE_NAME, session_key)
+        self.csrf_token = None
+
+    def fill(self, template):
+        values = {name: self.rng.choice(choices)
+                  for name, choices in self.placeholders.items()
+                  if choices and f'{{{name}}}' in template}
+        return template.format(**values)
+
+    def ensure_csrf_token(self):
+        if self.csrf_token is None:
+            post_id = self.rng.choice(self.placeholders['post_id'])
+            state = self.http.get(
+                f'{self.base_url}/posts/{post_id}/state/',
+                timeout=REQUEST_TIMEOUT).json()
+            self.csrf_token = state.get('csrf_token')
+        return self.csrf_token
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            step = self.rng.choices(self.steps, self.weights)[0]
+            headers = {}
+            if step['method'] != 'GET':
+                headers['X-CSRFToken'] = self.ensure_csrf_token() or ''
+                headers['Referer'] = self.base_url
+            started = time.monotonic()
+            try:
+                response = self.http.request(
+                    step['method'], self.base_url + self.fill(step['path']),
+                    data=step['data'], headers=headers,
+                    allow_redirects=False, timeout=REQUEST_TIMEOUT)
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            self.results.record(
+                step['name'], (time.monotonic() - started) * 1000, failed)
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name, latency_ms, failed):
+        with self.lock:
+            self.latencies[name].append(latency_ms)
+            if failed:
+                self.errors[name] += 1
+
+    def summary(self, elapsed):
+        report = {}
+        for name, latencies in sorted(self.latencies.items()):
+            report[name] = {
+                'requests': len(latencies),
+                'errors': self.errors[name],
+                'throughput_rps': round(len(latencies) / elapsed, 2),
+                **{f'p{percent}_ms': round(percentile(latencies, percent), 2)
+                   for percent in PERCENTILES},
+            }
+        return report
+
+
+def run_load(base_url, scenario, seed=0):
+    """Запускает виртуальных пользователей и возвращает отчёт по шагам."""
+    placeholders = sample_placeholders()
+    for step in scenario['steps']:
+        for name, choices in placeholders.items():
+            if f'{{{name}}}' in step['path'] and not choices:
+                raise ValueError(
+                    f'Шаг {step["name"]}: в БД нет данных для {{{name}}}')
+    accounts = scenario.get('accounts', [])
+    session_keys = [make_session(username) for username in accounts]
+    anonymous_steps = [step for step in scenario['steps']
+                       if not step['auth']]
+    results = Results()
+    started = time.monotonic()
+    deadline = started + scenario['duration']
+    users = []
+    for number in range(scenario['virtual_users']):
+        session_key = (session_keys[number % len(session_keys)]
+                       if session_keys else None)
+        steps = scenario['steps'] if session_key else anonymous_steps
+        if not steps:
+            continue
+        users.append(VirtualUser(base_url, steps, placeholders, session_key,
+                                 deadline, results, seed + number))
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    return results.summary(time.monotonic() - started)
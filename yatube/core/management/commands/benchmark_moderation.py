@@ -0,0 +1,66 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.moderation import Automaton, normalize
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_word(rng, min_length, max_length):
+    return ''.join(rng.choice(ALPHABET)
+                   for _ in range(rng.randint(min_length, max_length)))
+
+
+def naive_find(patterns, text):
+    text = normalize(text)
+    return [pattern for pattern in patterns if pattern in text]
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает автомат Ахо — Корасик с поиском каждого слова '
+            'по очереди на текстах разной длины.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patterns', type=int, default=5000)
+        parser.add_argument('--lengths', type=int, nargs='+',
+                            default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        patterns = [random_word(rng, 5, 12)
+                    for _ in range(options['patterns'])]
+        started = time.perf_counter()
+        automaton = Automaton(patterns)
+        self.stdout.write(
+            f'Шаблонов: {len(patterns)}, сборка автомата: '
+            f'{(time.perf_counter() - started) * 1000:.1f} мс')
+        normalized = [normalize(pattern) for pattern in patterns]
+        self.stdout.write(
+            f'{"Символов":>10}{"автомат мс":>14}{"мкс/символ":>14}'
+            f'{"по очереди мс":>16}')
+        for length in options['lengths']:
+            words, size = [], 0
+            while size < length:
+                words.append(random_word(rng, 2, 10))
+                size += len(words[-1]) + 1
+            text = ' '.join(words)[:length]
+            automaton_ms = best_time(
+                lambda: automaton.find(text), options['repeat'])
+            naive_ms = best_time(
+                lambda: naive_find(normalized, text), options['repeat'])
+            self.stdout.write(
+                f'{length:>10}{automaton_ms:>14.2f}'
+                f'{automaton_ms * 1000 / length:>14.3f}{naive_ms:>16.2f}')
@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import loadtest
+
+
+class Command(BaseCommand):
+    help = ('Поднимает yatube.wsgi.application и нагружает его '
+            'виртуальными пользователями по сценарию. Шаги с записью '
+            'изменяют текущую БД — запускайте на копии.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', help='JSON-файл сценария')
+        parser.add_argument('--url',
+                            help='Нагружать уже запущенный сервер')
+        parser.add_argument('--server-processes', type=int, default=1)
+        parser.add_argument('--virtual-users', type=int)
+        parser.add_argument('--duration', type=float)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Куда сохранить JSON')
+        parser.add_argument('--throttle', action='store_true',
+                            help='Оставить рабочие THROTTLE_RATES')
+
+    def handle(self, *args, **options):
+        scenario = loadtest.load_scenario(options['scenario'])
+        for option in ('virtual_users', 'duration'):
+            if options[option] is not None:
+                scenario[option] = options[option]
+        base_url = options['url']
+        if base_url is not None:
+            self.stdout.write('Внешний сервер применяет свои THROTTLE_RATES; '
+                              'ответы 429 считаются ошибками.')
+            report = loadtest.run_load(base_url, scenario, options['seed'])
+        elif options['throttle']:
+            report = self.run_own_server(scenario, options)
+        else:
+            with loadtest.unthrottled():
+                report = self.run_own_server(scenario, options)
+        self.stdout.write(
+            f'{"Шаг":<20}{"запросов":>10}{"ошибок":>8}{"rps":>10}'
+            f'{"p50 мс":>10}{"p95 мс":>10}{"p99 мс":>10}')
+        for name, step in report.items():
+            self.stdout.write(
+                f'{name:<20}{step["requests"]:>10}{step["errors"]:>8}'
+                f'{step["throughput_rps"]:>10.1f}{step["p50_ms"]:>10.1f}'
+                f'{step["p95_ms"]:>10.1f}{step["p99_ms"]:>10.1f}')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+
+    def run_own_server(self, scenario, options):
+        server = loadtest.Server(processes=options['server_processes'])
+        server.start()
+        try:
+            return loadtest.run_load(server.url, scenario, options['seed'])
+        finally:
+            server.stop()
@@ -0,0 +1,82 @@
+import os
+import pstats
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import profiling
+
+
+def own_times(path):
+    """{функция: собственное время} из файла cProfile."""
+    stats = pstats.Stats(path).stats
+    return {func: values[2] for func, values in stats.items()}
+
+
+def format_func(func):
+    filename, line, name = func
+    return f'{os.path.basename(filename)}:{line}({name})'
+
+
+class Command(BaseCommand):
+    help = 'Список сохранённых профилей по view и сравнение двух профилей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=('list', 'diff'))
+        parser.add_argument('--dir', default=settings.PROFILING_DIR)
+        parser.add_argument('--view', help='Имя URL, например posts:index')
+        parser.add_argument('--files', nargs=2, metavar=('OLD', 'NEW'),
+                            help='Два .prof файла для сравнения')
+        parser.add_argument('--top', type=int, default=15)
+
+    def handle(self, *args, **options):
+        if not options['dir'] and not options['files']:
+            raise CommandError('Укажите --dir или настройку PROFILING_DIR.')
+        if options['action'] == 'list':
+            self.list_profiles(options['dir'], options['view'])
+        else:
+            self.diff_profiles(options)
+
+    def list_profiles(self, directory, view_name):
+        by_view = defaultdict(list)
+        for path in profiling.list_profiles(directory, view_name):
+            by_view[profiling.parse_name(path)[0]].append(path)
+        for view, paths in sorted(by_view.items()):
+            self.stdout.write(f'{view}: {len(paths)}')
+            for path in paths:
+                created = datetime.fromtimestamp(
+                    profiling.parse_name(path)[1] / 1000000)
+                self.stdout.write(
+                    f'    {created:%Y-%m-%d %H:%M:%S}'
+                    f'  {os.path.basename(path)}')
+
+    def diff_profiles(self, options):
+        if options['files']:
+            old, new = options['files']
+        else:
+            if not options['view']:
+                raise CommandError('Для diff укажите --view или --files.')
+            paths = profiling.list_profiles(options['dir'], options['view'])
+            if len(paths) < 2:
+                raise CommandError(
+                    f'Для {options["view"]} нужно хотя бы два профиля.')
+            old, new = paths[-2:]
+        top = options['top']
+        self.stdout.write(f'Профили: {old} -> {new}')
+        self.stdout.write('Собственное время функций, изменение в мс:')
+        old_times, new_times = own_times(old), own_times(new)
+        deltas = sorted(
+            ((new_times.get(func, 0) - old_times.get(func, 0), func)
+             for func in set(old_times) | set(new_times)),
+            key=lambda item: abs(item[0]), reverse=True)
+        for delta, func in deltas[:top]:
+            self.stdout.write(
+                f'    {delta * 1000:+10.3f}  {format_func(func)}')
+        self.stdout.write('Память, изменение по строкам:')
+        old_snapshot = tracemalloc.Snapshot.load(profiling.snapshot_path(old))
+        new_snapshot = tracemalloc.Snapshot.load(profiling.snapshot_path(new))
+        for stat in new_snapshot.compare_to(old_snapshot, 'lineno')[:top]:
+            self.stdout.write(f'    {stat}')
@@ -0,0 +1,31 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в пуле потоков или процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Число потоков или процессов')
+        parser.add_argument('--processes', action='store_true',
+                            help='Процессы вместо потоков')
+        parser.add_argument('--burst', action='store_true',
+                            help='Завершиться, когда очередь опустеет')
+        parser.add_argument('--poll-interval', type=float,
+                            help='Пауза при пустой очереди, секунды')
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options['concurrency'],
+            processes=options['processes'],
+            burst=options['burst'],
+            poll_interval=options['poll_interval'],
+        )
+        if not options['processes']:
+            signal.signal(signal.SIGTERM, worker.stop)
+            signal.signal(signal.SIGINT, worker.stop)
+        worker.run()
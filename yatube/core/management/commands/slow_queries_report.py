@@ -0,0 +1,45 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import slow_queries
+
+SORT_KEYS = ('total_ms', 'occurrences', 'max_ms')
+
+
+class Command(BaseCommand):
+    help = 'Сводка журнала медленных и повторяющихся SQL-запросов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=settings.SLOW_QUERY_LOG_FILE)
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--sort', choices=SORT_KEYS, default='total_ms')
+
+    def handle(self, *args, **options):
+        if not options['file']:
+            raise CommandError(
+                'Укажите --file или настройку SLOW_QUERY_LOG_FILE.')
+        offenders = defaultdict(lambda: {
+            'occurrences': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'queries': 0, 'url_names': set(),
+        })
+        for entry in slow_queries.read_entries(options['file']):
+            key = (entry['sql'], entry['template'] or entry['frame'])
+            offender = offenders[key]
+            offender['occurrences'] += 1
+            offender['queries'] += entry['count']
+            offender['total_ms'] += entry['duration_ms']
+            offender['max_ms'] = max(offender['max_ms'], entry['duration_ms'])
+            offender['url_names'].add(entry['url_name'] or '-')
+        top = sorted(offenders.items(),
+                     key=lambda item: item[1][options['sort']],
+                     reverse=True)[:options['top']]
+        for (sql, origin), offender in top:
+            self.stdout.write(
+                f"{offender['occurrences']:>6} раз, "
+                f"{offender['queries']} запросов, "
+                f"всего {offender['total_ms']:.1f} мс, "
+                f"макс. {offender['max_ms']:.1f} мс | "
+                f"{', '.join(sorted(offender['url_names']))} | {origin}")
+            self.stdout.write(f'    {sql}')
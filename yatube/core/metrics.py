@@ -0,0 +1,203 @@
+"""Метрики, общие для всех процессов-воркеров.
+
+Каждый процесс пишет только в свой mmap-файл в settings.METRICS_DIR,
+поэтому межпроцессные блокировки не нужны. Эндпоинт метрик читает все
+файлы каталога и суммирует значения с одинаковыми ключами.
+
+Файл: 8 байт заголовка (занятый размер), затем записи
+[длина ключа: uint32][ключ, выровненный до 8 байт][значение: float64].
+Ключ — имя метрики с метками в синтаксисе Prometheus.
+"""
+import glob
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+
+INITIAL_SIZE = 1 << 16
+HEADER = struct.Struct('<Q')
+LENGTH = struct.Struct('<I')
+VALUE = struct.Struct('<d')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+METRIC_TYPES = {
+    'yatube_requests_total': 'counter',
+    'yatube_request_duration_seconds': 'histogram',
+    'yatube_request_queries': 'histogram',
+    'yatube_cache_requests_total': 'counter',
+    'yatube_shed_requests_total': 'counter',
+}
+
+
+def _padded(length):
+    return LENGTH.size + length + (-(LENGTH.size + length) % 8)
+
+
+class MmapedDict:
+    """Словарь ключ -> float64 в файле, отображённом в память."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'a+b')
+        if os.fstat(self.file.fileno()).st_size == 0:
+            self.file.truncate(INITIAL_SIZE)
+        self.capacity = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), self.capacity)
+        self.used = HEADER.unpack_from(self.map, 0)[0] or HEADER.size
+        self.positions = {key: position
+                          for key, _, position in read_entries(self.map)}
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        self.map.close()
+        self.file.truncate(capacity)
+        self.capacity = capacity
+        self.map = mmap.mmap(self.file.fileno(), capacity)
+
+    def _add_key(self, key):
+        encoded = key.encode()
+        size = _padded(len(encoded))
+        if self.used + size + VALUE.size > self.capacity:
+            self._grow(self.used + size + VALUE.size)
+        LENGTH.pack_into(self.map, self.used, len(encoded))
+        self.map[self.used + LENGTH.size:
+                 self.used + LENGTH.size + len(encoded)] = encoded
+        position = self.used + size
+        VALUE.pack_into(self.map, position, 0.0)
+        self.used = position + VALUE.size
+        HEADER.pack_into(self.map, 0, self.used)
+        self.positions[key] = position
+        return position
+
+    def inc(self, key, amount=1):
+        with self.lock:
+            position = self.positions.get(key)
+            if position is None:
+                position = self._add_key(key)
+            value = VALUE.unpack_from(self.map, position)[0]
+            VALUE.pack_into(self.map, position, value + amount)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def read_entries(data):
+    used = HEADER.unpack_from(data, 0)[0]
+    offset = HEADER.size
+    while offset < used:
+        length = LENGTH.unpack_from(data, offset)[0]
+        key = bytes(data[offset + LENGTH.size:
+                         offset + LENGTH.size + length]).decode()
+        position = offset + _padded(length)
+        yield key, VALUE.unpack_from(data, position)[0], position
+        offset = position + VALUE.size
+
+
+_store = None
+_store_lock = threading.Lock()
+_missing = object()
+
+
+def get_store():
+    """Файл текущего процесса; после fork открывается новый."""
+    global _store
+    directory = settings.METRICS_DIR
+    if not directory:
+        return None
+    path = os.path.join(directory, f'{os.getpid()}.db')
+    if _store is None or _store.path != path:
+        with _store_lock:
+            if _store is None or _store.path != path:
+                os.makedirs(directory, exist_ok=True)
+                _store = MmapedDict(path)
+    return _store
+
+
+def format_labels(labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def inc(name, labels, amount=1):
+    store = get_store()
+    if store is not None:
+        store.inc(f'{name}{{{format_labels(labels)}}}', amount)
+
+
+def observe(name, labels, value, buckets):
+    store = get_store()
+    if store is None:
+        return
+    prefix = format_labels(labels)
+    for bound in buckets:
+        if value <= bound:
+            store.inc(f'{name}_bucket{{{prefix},le="{bound}"}}')
+    store.inc(f'{name}_bucket{{{prefix},le="+Inf"}}')
+    store.inc(f'{name}_sum{{{prefix}}}', value)
+    store.inc(f'{name}_count{{{prefix}}}')
+
+
+def collect(metrics_dir):
+    """Суммирует значения по всем файлам процессов."""
+    totals = defaultdict(float)
+    for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < HEADER.size:
+            continue
+        for key, value, _ in read_entries(data):
+            totals[key] += value
+    return totals
+
+
+def family(key):
+    name = key.split('{', 1)[0]
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in METRIC_TYPES:
+            return name[:-len(suffix)]
+    return name
+
+
+def render_prometheus(metrics_dir):
+    families = defaultdict(list)
+    for key, value in sorted(collect(metrics_dir).items()):
+        families[family(key)].append(f'{key} {value!r}')
+    lines = []
+    for name, samples in families.items():
+        lines.append(f'# TYPE {name} {METRIC_TYPES.get(name, "untyped")}')
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+def _counted_get(get):
+    @wraps(get)
+    def wrapper(key, default=None, version=None):
+        value = get(key, _missing, version)
+        hit = value is not _missing
+        inc('yatube_cache_requests_total',
+            {'result': 'hit' if hit else 'miss'})
+        return value if hit else default
+    return wrapper
+
+
+def install():
+    """Считает попадания и промахи кеша default.
+
+    Оборачивается get экземпляра, а не класса бэкенда: другие кеши того же
+    класса не считаются. Экземпляры caches свои у каждого потока, поэтому
+    install() вызывается на каждый запрос и оборачивает get один раз.
+    """
+    backend = caches['default']
+    if not getattr(backend, 'counts_metrics', False):
+        backend.get = _counted_get(backend.get)
+        backend.counts_metrics = True
@@ -0,0 +1,291 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_cache_control
+
+from . import metrics, profiling, slow_queries, timing
+
+HIGH_PRIORITY, NORMAL_PRIORITY, LOW_PRIORITY = range(3)
+LATENCY_SMOOTHING = 0.2
+# Без обслуженных запросов оценка задержки не обновлялась бы вовсе,
+# поэтому каждый отброшенный запрос понемногу её снижает.
+SHED_LATENCY_DECAY = 0.99
+
+timing_logger = logging.getLogger('yatube.timing')
+
+
+class AnonymousFastPathMiddleware:
+    """Отдаёт публичные страницы анонимам в обход сессий, CSRF и auth.
+
+    Должен стоять в MIDDLEWARE перед SessionMiddleware: для GET/HEAD
+    запросов без сессионной куки view вызывается напрямую, поэтому
+    в ответ не попадает Vary: Cookie и его можно кешировать на прокси.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.url_names = set(settings.ANONYMOUS_FAST_PATH_URL_NAMES)
+
+    def __call__(self, request):
+        match = self.resolve_fast_path(request)
+        if match is None:
+            response = self.get_response(request)
+            if self.is_fast_path_url(request):
+                patch_cache_control(response, private=True)
+            return response
+        request.resolver_match = match
+        request.user = AnonymousUser()
+        response = match.func(request, *match.args, **match.kwargs)
+        if response.status_code == 200:
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=settings.ANONYMOUS_CACHE_MAX_AGE,
+            )
+        response.setdefault('X-Frame-Options', settings.X_FRAME_OPTIONS)
+        return response
+
+    def is_fast_path_url(self, request):
+        match = getattr(request, 'resolver_match', None)
+        return match is not None and match.view_name in self.url_names
+
+    def resolve_fast_path(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if match.view_name not in self.url_names:
+            return None
+        return match
+
+
+class LoadState:
+    """Нагрузка на текущий процесс: запросы в работе и средняя задержка."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.latency_ms = 0.0
+        self.shed = Counter()
+
+    def start(self):
+        with self.lock:
+            self.in_flight += 1
+            return self.in_flight - 1
+
+    def finish(self, duration_ms=None):
+        with self.lock:
+            self.in_flight -= 1
+            if duration_ms is None:
+                self.latency_ms *= SHED_LATENCY_DECAY
+            else:
+                self.latency_ms += LATENCY_SMOOTHING * (
+                    duration_ms - self.latency_ms)
+
+    def record_shed(self, reason):
+        with self.lock:
+            self.shed[reason] += 1
+        metrics.inc('yatube_shed_requests_total', {'reason': reason})
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'in_flight': self.in_flight,
+                'latency_ms': round(self.latency_ms, 1),
+                'shed': dict(self.shed),
+            }
+
+
+load_state = LoadState()
+
+
+class LoadSheddingMiddleware:
+    """Быстро отвечает 503 на второстепенные запросы при перегрузке.
+
+    Ставится первым в MIDDLEWARE. Записи и страница поста не отбрасываются
+    никогда; глубокие страницы пагинации, поиск и боты отбрасываются, как
+    только процесс перегружен; остальное — при двукратном превышении
+    лимита запросов в работе.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.bots = re.compile(settings.LOAD_SHEDDING_BOT_USER_AGENTS, re.I)
+
+    def __call__(self, request):
+        priority, reason = self.classify(request)
+        in_flight = load_state.start()
+        if self.should_shed(priority, in_flight):
+            load_state.finish()
+            load_state.record_shed(reason)
+            response = HttpResponse(
+                'Сервис перегружен, попробуйте позже', status=503)
+            response['Retry-After'] = '1'
+            return response
+        started = time.monotonic()
+        try:
+            return self.get_response(request)
+        finally:
+            load_state.finish((time.monotonic() - started) * 1000)
+
+    def should_shed(self, priority, in_flight):
+        if priority == HIGH_PRIORITY:
+            return False
+        limit = settings.LOAD_SHEDDING_MAX_IN_FLIGHT
+        overloaded = (
+            in_flight >= limit
+            or load_state.latency_ms > settings.LOAD_SHEDDING_LATENCY_MS
+        )
+        if priority == LOW_PRIORITY:
+            return overloaded
+        return in_flight >= 2 * limit
+
+    def classify(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return HIGH_PRIORITY, 'write'
+        try:
+            view_name = resolve(request.path_info).view_name
+        except Resolver404:
+            view_name = None
+        if view_name in settings.LOAD_SHEDDING_PROTECTED_URL_NAMES:
+            return HIGH_PRIORITY, view_name
+        page = request.GET.get('page', '')
+        if page.isdigit() and int(page) > settings.LOAD_SHEDDING_DEEP_PAGE:
+            return LOW_PRIORITY, 'deep_page'
+        if 'q' in request.GET:
+            return LOW_PRIORITY, 'search'
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        if (settings.SESSION_COOKIE_NAME not in request.COOKIES
+                and self.bots.search(user_agent)):
+            return LOW_PRIORITY, 'bot'
+        return NORMAL_PRIORITY, 'overload'
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else None
+
+
+class ServerTimingMiddleware:
+    """Добавляет заголовок Server-Timing: запросы к БД, рендеринг, миниатюры.
+
+    Включается настройкой SERVER_TIMING_ENABLED; те же данные пишутся
+    в лог yatube.timing с именем URL.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        timing.install()
+
+    def __call__(self, request):
+        with timing.collect() as timings:
+            response = self.get_response(request)
+        total_ms = timings.total_ms
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={timings.db_ms:.1f};desc="{timings.queries} queries"',
+            f'render;dur={timings.render_ms:.1f}',
+            f'thumbnail;dur={timings.thumbnail_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ))
+        view_name = get_view_name(request)
+        timing_logger.info(
+            '%s status=%s queries=%d db_ms=%.1f render_ms=%.1f '
+            'thumbnail_ms=%.1f total_ms=%.1f',
+            view_name, response.status_code, timings.queries,
+            timings.db_ms, timings.render_ms, timings.thumbnail_ms,
+            total_ms,
+            extra={
+                'url_name': view_name,
+                'status': response.status_code,
+                'queries': timings.queries,
+                'db_ms': timings.db_ms,
+                'render_ms': timings.render_ms,
+                'thumbnail_ms': timings.thumbnail_ms,
+                'total_ms': total_ms,
+            },
+        )
+        return response
+
+
+class MetricsMiddleware:
+    """Пишет число запросов, задержку и число SQL-запросов по имени URL.
+
+    Включается настройкой METRICS_DIR: туда каждый процесс пишет свой
+    mmap-файл, сводка отдаётся на /metrics в формате Prometheus.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        timing.install()
+
+    def __call__(self, request):
+        metrics.install()
+        with timing.collect() as timings:
+            response = self.get_response(request)
+        view = get_view_name(request) or 'unresolved'
+        metrics.inc('yatube_requests_total',
+                    {'view': view, 'status': response.status_code})
+        metrics.observe('yatube_request_duration_seconds', {'view': view},
+                        timings.total_ms / 1000, metrics.LATENCY_BUCKETS)
+        metrics.observe('yatube_request_queries', {'view': view},
+                        timings.queries, metrics.QUERY_BUCKETS)
+        return response
+
+
+class SlowQueryLogMiddleware:
+    """Пишет в SLOW_QUERY_LOG_FILE медленные и повторяющиеся SQL-запросы.
+
+    Медленный — дольше SLOW_QUERY_THRESHOLD_MS, повторяющийся — выполнен
+    за запрос больше SLOW_QUERY_REPEAT_THRESHOLD раз.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_LOG_FILE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        slow_queries.setup_handler()
+
+    def __call__(self, request):
+        with slow_queries.record_queries() as recorder:
+            response = self.get_response(request)
+        if recorder.entries:
+            slow_queries.write_entries(
+                recorder.entries, get_view_name(request), request.path)
+        return response
+
+
+class ProfilingMiddleware:
+    """Профилирует view и рендеринг шаблона через cProfile и tracemalloc.
+
+    Включается настройкой PROFILING_DIR. Профилируется доля запросов
+    PROFILING_SAMPLE_RATE и любой запрос с подписанным заголовком
+    X-Profile (см. profiling.make_token). Ставится непосредственно
+    перед AnonymousFastPathMiddleware, чтобы охватить и быстрый путь.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.should_profile(request):
+            return self.get_response(request)
+        with profiling.profile_request(lambda: get_view_name(request)):
+            return self.get_response(request)
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:21
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_locked_at(apps, schema_editor):
+    Job = apps.get_model('core', 'Job')
+    Job.objects.filter(status='running').update(heartbeat_at=F('locked_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Обработчик жив'),
+        ),
+        migrations.RunPython(copy_locked_at, migrations.RunPython.noop),
+    ]
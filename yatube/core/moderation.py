@@ -0,0 +1,115 @@
+"""Проверка текста по списку запрещённых слов и фраз.
+
+Список (settings.MODERATION_WORDS_FILE, по слову или фразе в строке,
+# — комментарий) компилируется в автомат Ахо — Корасик, поэтому
+проверка линейна по длине текста независимо от числа слов. Автомат
+пересобирается, когда меняется время изменения файла.
+
+Текст и слова нормализуются одинаково: NFKC, casefold, ё -> е и
+латинские буквы, похожие на кириллические, -> кириллица, так что
+«ОТСТОЙ», «oтстой» с латинской o и «отстой» совпадают.
+"""
+import os
+import threading
+import unicodedata
+from collections import deque
+
+from django.conf import settings
+
+HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к',
+    'm': 'м', 'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у',
+    'ё': 'е', '0': 'о', '3': 'з',
+})
+
+_lock = threading.Lock()
+_loaded = {'path': None, 'mtime': None, 'automaton': None}
+
+
+def normalize(text):
+    return unicodedata.normalize('NFKC', text).casefold().translate(
+        HOMOGLYPHS)
+
+
+class Automaton:
+    """Автомат Ахо — Корасик: goto-таблица, суффиксные ссылки и выходы."""
+
+    def __init__(self, patterns):
+        self.patterns = []
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for pattern in patterns:
+            self.add(pattern)
+        self.build()
+
+    def add(self, pattern):
+        normalized = normalize(pattern)
+        if not normalized:
+            return
+        state = 0
+        for char in normalized:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            state = next_state
+        self.output[state] += (len(self.patterns),)
+        self.patterns.append(pattern)
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] += self.output[self.fail[next_state]]
+
+    def find(self, text):
+        """Шаблоны, встречающиеся в тексте, в порядке первого вхождения."""
+        goto, fail, output = self.goto, self.fail, self.output
+        found = {}
+        state = 0
+        for char in normalize(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                found.setdefault(index, None)
+        return [self.patterns[index] for index in found]
+
+
+def read_patterns(path):
+    with open(path, encoding='utf-8') as words_file:
+        for line in words_file:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+
+def get_automaton():
+    """Автомат для текущего списка слов; пересобирается при его изменении."""
+    path = settings.MODERATION_WORDS_FILE
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    if _loaded['path'] != path or _loaded['mtime'] != mtime:
+        with _lock:
+            if _loaded['path'] != path or _loaded['mtime'] != mtime:
+                patterns = read_patterns(path) if mtime is not None else ()
+                _loaded['automaton'] = Automaton(patterns)
+                _loaded['path'], _loaded['mtime'] = path, mtime
+    return _loaded['automaton']
+
+
+def find_forbidden(text):
+    return get_automaton().find(text)
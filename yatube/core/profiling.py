@@ -0,0 +1,110 @@
+"""Профилирование отдельных запросов: cProfile и снимки tracemalloc.
+
+Файлы называются <имя URL>__<время в мкс>__<pid>.prof/.snapshot и лежат
+в settings.PROFILING_DIR; хранится не больше PROFILING_MAX_FILES пар.
+"""
+import cProfile
+import glob
+import os
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import signing
+
+HEADER = 'HTTP_X_PROFILE'
+SIGNING_SALT = 'yatube.profiling'
+PROFILE_SUFFIX = '.prof'
+SNAPSHOT_SUFFIX = '.snapshot'
+TRACEMALLOC_FRAMES = 10
+
+# tracemalloc включается на весь процесс, поэтому одновременно
+# профилируется только один запрос.
+_lock = threading.Lock()
+
+
+def make_token():
+    """Значение заголовка X-Profile для принудительного профилирования."""
+    return signing.dumps('profile', salt=SIGNING_SALT)
+
+
+def has_valid_token(request):
+    token = request.META.get(HEADER)
+    if not token:
+        return False
+    try:
+        signing.loads(token, salt=SIGNING_SALT,
+                      max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def should_profile(request):
+    return (has_valid_token(request)
+            or random.random() < settings.PROFILING_SAMPLE_RATE)
+
+
+def view_slug(view_name):
+    return (view_name or 'unresolved').replace(':', '.')
+
+
+def parse_name(path):
+    """'posts.index__<мкс>__<pid>.prof' -> ('posts:index', <мкс>)."""
+    slug, timestamp, _ = os.path.basename(path).split('__')
+    return slug.replace('.', ':'), int(timestamp)
+
+
+@contextmanager
+def profile_request(view_name_getter):
+    """Профилирует блок, если процесс не занят другим профилированием."""
+    if not _lock.acquire(blocking=False):
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+        save(view_name_getter(), profiler, snapshot)
+    finally:
+        _lock.release()
+
+
+def save(view_name, profiler, snapshot):
+    directory = settings.PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(
+        directory,
+        f'{view_slug(view_name)}__{time.time_ns() // 1000}__{os.getpid()}')
+    profiler.dump_stats(base + PROFILE_SUFFIX)
+    snapshot.dump(base + SNAPSHOT_SUFFIX)
+    prune(directory, settings.PROFILING_MAX_FILES)
+
+
+def list_profiles(directory, view_name=None):
+    """Пути .prof файлов, от старых к новым."""
+    paths = glob.glob(os.path.join(directory, '*' + PROFILE_SUFFIX))
+    if view_name is not None:
+        paths = [path for path in paths if parse_name(path)[0] == view_name]
+    return sorted(paths, key=lambda path: parse_name(path)[1])
+
+
+def snapshot_path(profile_path):
+    return profile_path[:-len(PROFILE_SUFFIX)] + SNAPSHOT_SUFFIX
+
+
+def prune(directory, max_files):
+    profiles = list_profiles(directory)
+    for path in profiles[:max(len(profiles) - max_files, 0)]:
+        for stale in (path, snapshot_path(path)):
+            if os.path.exists(stale):
+                os.remove(stale)
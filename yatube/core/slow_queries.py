@@ -0,0 +1,151 @@
+"""Журнал медленных и повторяющихся SQL-запросов.
+
+Для каждого попавшего в журнал запроса определяется, откуда он пришёл:
+строка шаблона (например, includes/article.html:4, где разыменовывается
+post.author) и ближайший кадр кода проекта.
+"""
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger('yatube.slow_queries')
+logger.propagate = False
+
+PLACEHOLDER_LIST = re.compile(r'%s(?:, %s)+')
+THIS_FILE = os.path.abspath(__file__)
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+_handler_lock = threading.Lock()
+
+
+def fingerprint(sql):
+    """SQL без зависимости от длины списков IN (...)."""
+    return PLACEHOLDER_LIST.sub('%s, ...', sql)
+
+
+def params_shape(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def find_origin():
+    """Строка шаблона и кадр кода проекта, вызвавшие запрос."""
+    template = frame_info = None
+    frame = sys._getframe(2)
+    while frame is not None and (template is None or frame_info is None):
+        code = frame.f_code
+        if template is None and code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                template = f'{origin.template_name}:{token.lineno}'
+        filename = os.path.abspath(code.co_filename)
+        if (frame_info is None
+                and filename.startswith(settings.BASE_DIR)
+                and filename != THIS_FILE
+                and 'site-packages' not in filename):
+            relative = os.path.relpath(filename, settings.BASE_DIR)
+            frame_info = f'{relative}:{frame.f_lineno} in {code.co_name}'
+        frame = frame.f_back
+    return template, frame_info
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.counts = Counter()
+        self.entries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.monotonic() - started) * 1000
+            self.record(sql, params, duration_ms)
+
+    def record(self, sql, params, duration_ms):
+        key = fingerprint(sql)
+        self.counts[key] += 1
+        count = self.counts[key]
+        if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            kind = 'slow'
+        elif count == settings.SLOW_QUERY_REPEAT_THRESHOLD + 1:
+            kind = 'repeated'
+        else:
+            return
+        template, frame = find_origin()
+        self.entries.append({
+            'kind': kind,
+            'sql': key,
+            'params_shape': params_shape(params),
+            'duration_ms': round(duration_ms, 3),
+            'template': template,
+            'frame': frame,
+        })
+
+
+@contextmanager
+def record_queries():
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+    for entry in recorder.entries:
+        entry['count'] = recorder.counts[entry['sql']]
+
+
+def setup_handler():
+    """Подключает ротируемый файл журнала; повторно не подключает."""
+    with _handler_lock:
+        path = os.path.abspath(settings.SLOW_QUERY_LOG_FILE)
+        for handler in logger.handlers:
+            if getattr(handler, 'baseFilename', None) == path:
+                return
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handler = RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+            encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+
+def write_entries(entries, url_name, path):
+    now = timezone.now().isoformat()
+    for entry in entries:
+        logger.info(json.dumps(
+            dict(entry, time=now, url_name=url_name, path=path),
+            ensure_ascii=False))
+
+
+def read_entries(path):
+    """Записи из журнала и его ротированных копий, от старых к новым."""
+    paths = [f'{path}.{number}'
+             for number in range(LOG_BACKUP_COUNT, 0, -1)] + [path]
+    for log_path in paths:
+        if not os.path.exists(log_path):
+            continue
+        with open(log_path, encoding='utf-8') as log_file:
+            for line in log_file:
+                if line.strip():
+                    yield json.loads(line)
@@ -0,0 +1,23 @@
+from django.test import SimpleTestCase
+
+from ..budgets import exceeded, format_diff, load_budgets, url_names
+
+
+class BudgetTests(SimpleTestCase):
+    def test_exceeded_limits(self):
+        """Превышением считается только значение больше бюджета."""
+        measured = {'queries': 7, 'bytes': 100, 'render_ms': 5.0}
+        budget = {'queries': 6, 'bytes': 100}
+        self.assertEqual(exceeded(measured, budget), ['queries'])
+
+    def test_diff_shows_overrun(self):
+        """В отчёте видно, на сколько превышен бюджет."""
+        diff = format_diff(
+            'posts:index', {'queries': 7, 'bytes': 100, 'render_ms': 5.0},
+            {'queries': 6, 'bytes': 200, 'render_ms': 50})
+        self.assertIn('posts:index', diff)
+        self.assertIn('+1', diff)
+
+    def test_budget_file_covers_every_url(self):
+        """Для каждого URL приложений задан бюджет."""
+        self.assertEqual(set(url_names()), set(load_budgets()))
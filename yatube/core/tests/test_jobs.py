@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from ..jobs import Worker, claim, enqueue, execute, run_pending, task
+from ..models import Job
+
+User = get_user_model()
+
+calls = Counter()
+calls_lock = threading.Lock()
+waiting = threading.Event()
+
+
+@task('tests.record')
+def record(key):
+    with calls_lock:
+        calls[key] += 1
+
+
+@task('tests.wait')
+def wait():
+    waiting.wait(5)
+
+
+@task('tests.fail', max_attempts=2)
+def fail():
+    raise ValueError('сбой')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_is_single_insert(self):
+        """Постановка в очередь — один запрос."""
+        with self.assertNumQueries(1):
+            enqueue('tests.record', key='a')
+
+    def test_higher_priority_runs_first(self):
+        """Задача с большим приоритетом забирается раньше."""
+        enqueue('tests.record', key='low')
+        high = enqueue('tests.record', priority=5, key='high')
+        self.assertEqual(claim('test').pk, high.pk)
+
+    def test_delayed_job_waits(self):
+        """Отложенная задача не выполняется раньше срока."""
+        enqueue('tests.record', delay=60, key='later')
+        self.assertEqual(run_pending(), 0)
+
+    def test_success_deletes_job(self):
+        """Выполненная задача удаляется из очереди."""
+        enqueue('tests.record', key='done')
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls['done'], 1)
+        self.assertFalse(Job.objects.exists())
+
+    def test_retry_with_backoff_then_failure(self):
+        """Упавшая задача откладывается, после max_attempts — failed."""
+        job = enqueue('tests.fail')
+        self.assertFalse(execute(claim('test')))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('ValueError', job.last_error)
+        Job.objects.filter(pk=job.pk).update(
+            run_at=timezone.now() - timedelta(seconds=1))
+        execute(claim('test'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_password_reset_email_is_queued(self):
+        """Письмо сброса пароля отправляет фоновая задача."""
+        User.objects.create_user(username='user', email='user@example.com',
+                                 password='password')
+        Client().post(reverse('users:password_reset'),
+                      {'email': 'user@example.com'})
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.get().task, 'users.send_email')
+        run_pending()
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+
+
+class WorkerPoolTests(TransactionTestCase):
+    def test_thread_pool_runs_each_job_once(self):
+        """Потоки пула не выполняют одну задачу дважды."""
+        calls.clear()
+        for number in range(30):
+            enqueue('tests.record', key=number)
+        Worker(concurrency=4, burst=True).run()
+        self.assertEqual(sorted(calls), list(range(30)))
+        self.assertEqual(set(calls.values()), {1})
+        self.assertFalse(Job.objects.exists())
+
+    def test_loop_requeues_stale_jobs_periodically(self):
+        """Обработчик возвращает брошенную задачу без перезапуска,
+        а задачу со свежей отметкой не трогает."""
+        calls.clear()
+        stale = timezone.now() - timedelta(
+            seconds=settings.JOB_LOCK_TIMEOUT + 1)
+        abandoned = enqueue('tests.record', key='abandoned')
+        alive = enqueue('tests.record', key='alive')
+        Job.objects.filter(pk=abandoned.pk).update(
+            status=Job.RUNNING, locked_at=stale, heartbeat_at=stale,
+            locked_by='gone')
+        Job.objects.filter(pk=alive.pk).update(
+            status=Job.RUNNING, locked_at=stale,
+            heartbeat_at=timezone.now(), locked_by='busy')
+        worker = Worker(burst=True)
+        worker.next_requeue = time.monotonic() + 60
+        worker.loop()
+        self.assertEqual(calls, {})
+        worker.next_requeue = 0
+        worker.loop()
+        self.assertEqual(calls, {'abandoned': 1})
+        self.assertEqual(Job.objects.get().pk, alive.pk)
+
+    @override_settings(JOB_HEARTBEAT_INTERVAL=0.01)
+    def test_running_job_sends_heartbeat(self):
+        """Долгая задача обновляет heartbeat_at, пока выполняется."""
+        job = enqueue('tests.wait')
+        claimed = claim('worker')
+        started = Job.objects.get(pk=job.pk).heartbeat_at
+        waiting.clear()
+        thread = threading.Thread(target=execute, args=[claimed])
+        thread.start()
+        deadline = time.monotonic() + 5
+        while (Job.objects.get(pk=job.pk).heartbeat_at == started
+               and time.monotonic() < deadline):
+            time.sleep(0.01)
+        waiting.set()
+        thread.join()
+        self.assertLess(time.monotonic(), deadline)
+        self.assertFalse(Job.objects.filter(pk=job.pk).exists())
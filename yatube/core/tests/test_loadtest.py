@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.test import LiveServerTestCase, override_settings
+
+from posts.models import Comment, Post
+from ..loadtest import run_load, unthrottled
+
+User = get_user_model()
+
+NO_THROTTLE = {'user': '10000/min', 'ip': '10000/min'}
+TIGHT_THROTTLE = {'user': '1/h', 'ip': '1/h'}
+COMMENT_STEP = {'name': 'comment', 'method': 'POST', 'auth': True,
+                'path': '/posts/{post_id}/comment/', 'weight': 1,
+                'data': {'text': 'Нагрузка'}}
+
+
+@override_settings(THROTTLE_RATES={
+    'post_create': NO_THROTTLE,
+    'add_comment': NO_THROTTLE,
+    'profile_follow': NO_THROTTLE,
+})
+class LoadTestTests(LiveServerTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        User.objects.create_user(username='reader')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+
+    def test_virtual_users_hit_live_server(self):
+        """Анонимные и вошедшие пользователи получают ответы без ошибок."""
+        report = run_load(self.live_server_url, {
+            'virtual_users': 2,
+            'duration': 0.5,
+            'accounts': ['reader'],
+            'steps': [
+                {'name': 'post', 'method': 'GET', 'path': '/posts/{post_id}/',
+                 'weight': 1, 'auth': False, 'data': None},
+                COMMENT_STEP,
+            ],
+        })
+        self.assertGreater(report['post']['requests'], 0)
+        self.assertEqual(report['post']['errors'], 0)
+        self.assertEqual(report['comment']['errors'], 0)
+        self.assertEqual(Comment.objects.count(),
+                         report['comment']['requests'])
+
+    def test_missing_placeholder_data_is_reported(self):
+        """Сценарий с пустым плейсхолдером не запускается."""
+        with self.assertRaises(ValueError):
+            run_load(self.live_server_url, {
+                'virtual_users': 1, 'duration': 0.1,
+                'steps': [{'name': 'group', 'path': '/group/{slug}/',
+                           'method': 'GET', 'weight': 1, 'auth': False,
+                           'data': None}],
+            })
+
+    @override_settings(THROTTLE_RATES={
+        'post_create': TIGHT_THROTTLE,
+        'add_comment': TIGHT_THROTTLE,
+        'profile_follow': TIGHT_THROTTLE,
+    })
+    def test_run_is_not_throttled(self):
+        """На время прогона рабочие лимиты не дают ответов 429."""
+        with unthrottled():
+            report = run_load(self.live_server_url, {
+                'virtual_users': 1, 'duration': 0.5,
+                'accounts': ['reader'], 'steps': [COMMENT_STEP],
+            })
+        self.assertGreater(report['comment']['requests'], 1)
+        self.assertEqual(report['comment']['errors'], 0)
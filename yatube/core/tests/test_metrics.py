@@ -0,0 +1,92 @@
+import multiprocessing
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+
+from .. import metrics
+
+User = get_user_model()
+
+PROCESSES = 4
+INCREMENTS = 250
+
+
+def increment_in_worker():
+    for _ in range(INCREMENTS):
+        metrics.inc('yatube_requests_total',
+                    {'view': 'posts:index', 'status': 200})
+    metrics.observe('yatube_request_queries', {'view': 'posts:index'},
+                    3, metrics.QUERY_BUCKETS)
+
+
+class SharedMetricsTests(SimpleTestCase):
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+    def test_values_are_summed_across_processes(self):
+        """Значения из нескольких процессов складываются."""
+        context = multiprocessing.get_context('fork')
+        with override_settings(METRICS_DIR=self.metrics_dir):
+            workers = [context.Process(target=increment_in_worker)
+                       for _ in range(PROCESSES)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        totals = metrics.collect(self.metrics_dir)
+        self.assertEqual(
+            totals['yatube_requests_total{view="posts:index",status="200"}'],
+            PROCESSES * INCREMENTS)
+        self.assertEqual(
+            totals['yatube_request_queries_bucket'
+                   '{view="posts:index",le="5"}'],
+            PROCESSES)
+        self.assertEqual(
+            totals['yatube_request_queries_bucket'
+                   '{view="posts:index",le="2"}'],
+            0)
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        cache.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+    def test_prometheus_endpoint(self):
+        """Эндпоинт отдаёт метрики запросов в текстовом формате."""
+        with override_settings(METRICS_DIR=self.metrics_dir):
+            client = Client()
+            client.get('/')
+            client.get('/')
+            response = client.get('/metrics')
+        content = response.content.decode()
+        self.assertIn('# TYPE yatube_requests_total counter', content)
+        self.assertIn(
+            'yatube_requests_total{view="posts:index",status="200"} 2.0',
+            content)
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram',
+                      content)
+        self.assertIn('yatube_cache_requests_total{result="hit"}', content)
+
+    def test_only_default_cache_is_counted(self):
+        """Считается только кеш default, класс бэкенда не меняется."""
+        other = LocMemCache('metrics-other', {})
+        with override_settings(METRICS_DIR=self.metrics_dir):
+            metrics.install()
+            metrics.install()
+            other.get('missing')
+            cache.get('missing')
+            counts = metrics.collect(self.metrics_dir)
+        self.assertEqual(
+            counts['yatube_cache_requests_total{result="miss"}'], 1)
+        self.assertFalse(hasattr(LocMemCache.get, '__wrapped__'))
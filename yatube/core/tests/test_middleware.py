@@ -0,0 +1,129 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client, override_settings
+from django.core.cache import cache
+
+from posts.models import Post
+from ..middleware import load_state
+
+User = get_user_model()
+
+
+class AnonymousFastPathTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='test-post')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_anonymous_pages_are_public(self):
+        """Публичные страницы анониму отдаются без Vary: Cookie."""
+        addresses = (
+            '/',
+            f'/profile/{self.user.username}/',
+            f'/posts/{self.post.pk}/',
+        )
+        for address in addresses:
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertNotIn('Cookie', response.get('Vary', ''))
+                self.assertNotIn('csrftoken', response.cookies)
+
+    def test_authorized_pages_are_private(self):
+        """Страницы авторизованного пользователя не кешируются прокси."""
+        response = self.authorized_client.get('/')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_missing_object_returns_not_found(self):
+        """Быстрый путь отдаёт 404 для несуществующего поста."""
+        response = self.guest_client.get('/posts/100500/')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertTemplateUsed(response, 'core/404.html')
+
+
+class LoadSheddingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='test-post')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.saved_latency = load_state.latency_ms
+        load_state.latency_ms = 10000
+        load_state.shed.clear()
+
+    def tearDown(self):
+        load_state.latency_ms = self.saved_latency
+
+    def test_low_priority_requests_are_shed(self):
+        """При перегрузке отбрасываются глубокие страницы и боты."""
+        response = self.guest_client.get('/?page=100')
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        response = self.guest_client.get('/', HTTP_USER_AGENT='Googlebot')
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertEqual(load_state.shed, {'deep_page': 1, 'bot': 1})
+
+    def test_post_detail_is_never_shed(self):
+        """Страница поста доступна даже при перегрузке."""
+        response = self.guest_client.get(
+            f'/posts/{self.post.pk}/', HTTP_USER_AGENT='Googlebot')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(LOAD_SHEDDING_MAX_IN_FLIGHT=0)
+    def test_normal_requests_are_shed_when_saturated(self):
+        """При насыщении отбрасываются и обычные запросы."""
+        response = self.guest_client.get('/')
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+
+    def test_load_status(self):
+        """Счётчики отброшенных запросов доступны для мониторинга."""
+        self.guest_client.get('/?q=test')
+        response = self.guest_client.get('/health/load/')
+        self.assertEqual(response.json()['shed'], {'search': 1})
+
+
+@override_settings(SERVER_TIMING_ENABLED=True)
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.user, text='test-post')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_server_timing_header_and_log(self):
+        """Ответ содержит Server-Timing, а лог — разбивку по имени URL."""
+        with self.assertLogs('yatube.timing', level='INFO') as logs:
+            response = self.guest_client.get(
+                f'/profile/{self.user.username}/')
+        header = response['Server-Timing']
+        for metric in ('db;dur=', 'render;dur=', 'thumbnail;dur=',
+                       'total;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, header)
+        record = logs.records[0]
+        self.assertEqual(record.url_name, 'posts:profile')
+        self.assertGreater(record.queries, 0)
+        self.assertGreater(record.render_ms, 0)
+
+    @override_settings(SERVER_TIMING_ENABLED=False)
+    def test_disabled_by_default(self):
+        """Без настройки заголовок не добавляется."""
+        response = self.guest_client.get('/')
+        self.assertFalse(response.has_header('Server-Timing'))
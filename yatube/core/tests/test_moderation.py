@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from ..moderation import Automaton, find_forbidden
+
+
+class AutomatonTests(SimpleTestCase):
+    def test_finds_overlapping_patterns(self):
+        """Находятся все шаблоны, включая вложенные и пересекающиеся."""
+        automaton = Automaton(['he', 'she', 'his', 'hers'])
+        self.assertEqual(automaton.find('ushers'), ['she', 'he', 'hers'])
+        self.assertEqual(automaton.find('ahis'), ['his'])
+        self.assertEqual(automaton.find('nothing'), [])
+
+    def test_case_and_homoglyphs_are_normalized(self):
+        """Регистр, ё и латинские двойники не спасают от фильтра."""
+        automaton = Automaton(['Отстой', 'ёжик'])
+        for text in ('ОТСТОЙ', 'oтстoй', 'OTCTOЙ', 'про ежика'):
+            with self.subTest(text=text):
+                self.assertTrue(automaton.find(text))
+
+
+class WordListTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'words.txt')
+        self.write('# комментарий\nспам\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, content):
+        with open(self.path, 'w', encoding='utf-8') as words_file:
+            words_file.write(content)
+
+    def test_list_is_reloaded_when_file_changes(self):
+        """После изменения списка автомат пересобирается."""
+        with override_settings(MODERATION_WORDS_FILE=self.path):
+            self.assertEqual(find_forbidden('СПАМ и реклама'), ['спам'])
+            self.write('реклама\n')
+            stat = os.stat(self.path)
+            os.utime(self.path, ns=(stat.st_atime_ns,
+                                    stat.st_mtime_ns + 1_000_000))
+            self.assertEqual(find_forbidden('СПАМ и реклама'), ['реклама'])
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from .. import profiling
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.profiling_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.profiling_dir, ignore_errors=True)
+
+    def test_sampled_requests_are_profiled(self):
+        """Выбранные запросы сохраняют .prof и снимок памяти."""
+        with override_settings(PROFILING_DIR=self.profiling_dir,
+                               PROFILING_SAMPLE_RATE=1):
+            Client().get('/')
+        paths = profiling.list_profiles(self.profiling_dir, 'posts:index')
+        self.assertEqual(len(paths), 1)
+        self.assertTrue(os.path.exists(profiling.snapshot_path(paths[0])))
+
+    def test_signed_header_forces_profiling(self):
+        """Подписанный заголовок включает профилирование, поддельный — нет."""
+        with override_settings(PROFILING_DIR=self.profiling_dir):
+            client = Client()
+            client.get('/', HTTP_X_PROFILE='forged')
+            self.assertEqual(profiling.list_profiles(self.profiling_dir), [])
+            client.get('/', HTTP_X_PROFILE=profiling.make_token())
+        self.assertEqual(len(profiling.list_profiles(self.profiling_dir)), 1)
+
+    def test_directory_is_bounded_and_diffable(self):
+        """Хранится не больше PROFILING_MAX_FILES профилей,
+        их можно сравнить."""
+        with override_settings(PROFILING_DIR=self.profiling_dir,
+                               PROFILING_SAMPLE_RATE=1,
+                               PROFILING_MAX_FILES=2):
+            client = Client()
+            for _ in range(3):
+                client.get('/about/author/')
+            self.assertEqual(len(os.listdir(self.profiling_dir)), 4)
+            out = StringIO()
+            call_command('profiles', 'list', stdout=out)
+            self.assertIn('about:author: 2', out.getvalue())
+            out = StringIO()
+            call_command('profiles', 'diff', view='about:author', stdout=out)
+            self.assertIn('Память, изменение по строкам', out.getvalue())
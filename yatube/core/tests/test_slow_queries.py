@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from posts.models import Post
+from .. import slow_queries
+
+User = get_user_model()
+
+AUTHORS_COUNT = 3
+
+
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for i in range(AUTHORS_COUNT):
+            author = User.objects.create_user(username=f'author{i}')
+            Post.objects.create(author=author, text=f'test-post-{i}')
+
+    def setUp(self):
+        cache.clear()
+        self.log_dir = tempfile.mkdtemp()
+        self.log_file = os.path.join(self.log_dir, 'slow_queries.log')
+
+    def tearDown(self):
+        for handler in list(slow_queries.logger.handlers):
+            slow_queries.logger.removeHandler(handler)
+            handler.close()
+        shutil.rmtree(self.log_dir, ignore_errors=True)
+
+    def test_repeated_query_is_attributed_to_template(self):
+        """Повторный запрос автора привязан к строке шаблона статьи."""
+        with override_settings(SLOW_QUERY_LOG_FILE=self.log_file,
+                               SLOW_QUERY_THRESHOLD_MS=10000,
+                               SLOW_QUERY_REPEAT_THRESHOLD=2):
+            Client().get('/')
+        entries = list(slow_queries.read_entries(self.log_file))
+        repeated = [entry for entry in entries
+                    if entry['kind'] == 'repeated']
+        self.assertEqual(len(repeated), 1)
+        entry = repeated[0]
+        self.assertIn('auth_user', entry['sql'])
+        self.assertEqual(entry['count'], AUTHORS_COUNT)
+        self.assertEqual(entry['params_shape'], ['int'])
+        self.assertEqual(entry['url_name'], 'posts:index')
+        self.assertTrue(entry['template'].startswith('includes/article.html'))
+
+    def test_report_command(self):
+        """Команда выводит самые частые медленные запросы."""
+        with override_settings(SLOW_QUERY_LOG_FILE=self.log_file,
+                               SLOW_QUERY_THRESHOLD_MS=0):
+            Client().get('/')
+        out = StringIO()
+        call_command('slow_queries_report', file=self.log_file, stdout=out)
+        self.assertIn('posts:index', out.getvalue())
+        self.assertIn('SELECT', out.getvalue())
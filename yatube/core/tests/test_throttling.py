@@ -0,0 +1,106 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from ..throttling import MICROSECONDS, consume
+
+User = get_user_model()
+
+THREADS = 16
+ATTEMPTS_PER_THREAD = 10
+
+
+class SlowCache:
+    """Кеш с задержкой перед incr, чтобы потоки перемежались."""
+
+    def __getattr__(self, name):
+        return getattr(cache, name)
+
+    def incr(self, *args, **kwargs):
+        time.sleep(0.01)
+        return cache.incr(*args, **kwargs)
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_limit_holds_under_concurrent_threads(self):
+        """Из параллельных потоков проходит ровно ёмкость бакета."""
+        def attempt(_):
+            return consume('throttle:test', '20/h')[0]
+
+        with ThreadPoolExecutor(max_workers=THREADS) as executor:
+            results = list(executor.map(
+                attempt, range(THREADS * ATTEMPTS_PER_THREAD)))
+        self.assertEqual(results.count(True), 20)
+
+    def test_burst_after_idle_catches_up_once(self):
+        """После простоя параллельная пачка сдвигает TAT только до now."""
+        key, rate, interval = 'throttle:idle', '60/h', 60 * MICROSECONDS
+        start = int(time.time() * MICROSECONDS)
+        cache.set(key, start - 60 * 60 * MICROSECONDS)
+        barrier = threading.Barrier(THREADS)
+
+        def attempt(_):
+            barrier.wait()
+            return consume(key, rate)[0]
+
+        with mock.patch('core.throttling.cache', SlowCache()), \
+                ThreadPoolExecutor(max_workers=THREADS) as executor:
+            results = list(executor.map(attempt, range(THREADS)))
+        self.assertEqual(results.count(True), THREADS)
+        end = int(time.time() * MICROSECONDS)
+        self.assertLessEqual(cache.get(key), end + THREADS * interval)
+
+    def test_denied_request_gets_retry_after(self):
+        """Отклонённый запрос знает, сколько ждать нового токена."""
+        self.assertTrue(consume('throttle:retry', '1/min')[0])
+        allowed, retry_after = consume('throttle:retry', '1/min')
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+        self.assertLessEqual(retry_after, 60)
+
+
+@override_settings(THROTTLE_RATES={
+    'post_create': {'user': '2/min', 'ip': '100/min'},
+    'add_comment': {'user': '2/min', 'ip': '100/min'},
+    'profile_follow': {'user': '2/min', 'ip': '100/min'},
+})
+class ThrottledViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='writer')
+        cls.post = Post.objects.create(author=cls.user, text='test-post')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_add_comment_returns_429(self):
+        """Превышение лимита комментариев отдаёт 429 с Retry-After."""
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        for _ in range(2):
+            response = self.authorized_client.post(url, {'text': 'comment'})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.authorized_client.post(url, {'text': 'comment'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertTrue(int(response['Retry-After']) > 0)
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_get_is_not_throttled(self):
+        """Открытие формы создания поста не расходует лимит."""
+        for _ in range(3):
+            response = self.authorized_client.get(reverse('posts:post_create'))
+            self.assertEqual(response.status_code, HTTPStatus.OK)
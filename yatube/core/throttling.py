@@ -0,0 +1,111 @@
+"""Ограничение частоты запросов: token bucket в общем кеше.
+
+Бакет хранится как одно целое число — теоретическое время прибытия (TAT)
+следующего запроса в микросекундах (алгоритм GCRA). Каждый запрос атомарно
+сдвигает TAT через cache.incr; если TAT ушёл дальше, чем на ёмкость бакета,
+запрос отклоняется, а сдвиг возвращается через cache.decr. При гонках TAT
+может сдвинуться лишь дальше, поэтому лимит не превышается. Отставший
+после простоя TAT поднимается до текущего времени один раз (catch_up).
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+MICROSECONDS = 1000000
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+BUCKET_TIMEOUT = 24 * 60 * 60
+LOCK_TIMEOUT = 1
+LOCK_ATTEMPTS = 50
+LOCK_DELAY = 0.002
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60): ёмкость бакета и период её восполнения."""
+    number, period = rate.split('/')
+    return int(number), PERIODS[period[0]]
+
+
+def catch_up(key, now):
+    """Поднимает отставший после простоя TAT до now.
+
+    Сдвиг делает один запрос под блокировкой, остальные ждут, пока TAT
+    не догонит now: иначе каждый параллельный запрос прибавил бы свой
+    сдвиг и TAT ушёл бы на время простоя вперёд.
+    """
+    lock = f'{key}:lock'
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(lock, 1, LOCK_TIMEOUT):
+            try:
+                tat = cache.get(key)
+                if tat is not None and tat < now:
+                    cache.incr(key, now - tat)
+            finally:
+                cache.delete(lock)
+            return
+        time.sleep(LOCK_DELAY)
+        tat = cache.get(key)
+        if tat is None or tat >= now:
+            return
+
+
+def consume(key, rate):
+    """Забирает токен из бакета key, возвращает (разрешено, retry_after)."""
+    burst, period = parse_rate(rate)
+    interval = period * MICROSECONDS // burst
+    capacity = period * MICROSECONDS
+    now = int(time.time() * MICROSECONDS)
+    if not cache.add(key, now, BUCKET_TIMEOUT):
+        tat = cache.get(key)
+        if tat is not None and tat < now:
+            catch_up(key, now)
+    try:
+        tat = cache.incr(key, interval)
+    except ValueError:
+        return True, 0
+    if tat - now > capacity:
+        cache.decr(key, interval)
+        return False, (tat - now - capacity) / MICROSECONDS
+    return True, 0
+
+
+def get_client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check_request(request, scope):
+    rates = settings.THROTTLE_RATES[scope]
+    buckets = [(f'throttle:{scope}:ip:{get_client_ip(request)}',
+                rates['ip'])]
+    if request.user.is_authenticated:
+        buckets.append((f'throttle:{scope}:user:{request.user.pk}',
+                        rates['user']))
+    retry_after = 0
+    for key, rate in buckets:
+        allowed, wait = consume(key, rate)
+        if not allowed:
+            retry_after = max(retry_after, wait)
+    return retry_after
+
+
+def throttle(scope, methods=None):
+    """Декоратор view: лимиты берутся из settings.THROTTLE_RATES[scope]."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                retry_after = check_request(request, scope)
+                if retry_after:
+                    return too_many_requests(request, retry_after)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def too_many_requests(request, retry_after):
+    response = render(request, 'core/429.html', status=429)
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
@@ -0,0 +1,105 @@
+"""Сбор времени БД, рендеринга шаблонов и миниатюр в рамках запроса.
+
+Данные копятся в thread-local объекте, пока активен collect(); вне
+запроса обёртки ничего не делают.
+"""
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from django.db import connections
+from django.template.base import Template
+from sorl.thumbnail.base import ThumbnailBackend
+
+_local = threading.local()
+_installed = False
+
+
+class RequestTimings:
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.render_ms = 0.0
+        self.thumbnail_ms = 0.0
+        self.render_depth = 0
+        self.started = time.monotonic()
+
+    @property
+    def total_ms(self):
+        return (time.monotonic() - self.started) * 1000
+
+
+def current():
+    return getattr(_local, 'timings', None)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    timings = current()
+    started = time.monotonic()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.db_ms += (time.monotonic() - started) * 1000
+
+
+@contextmanager
+def collect():
+    """Собирает время запроса; вложенный вызов использует внешний сбор."""
+    if current() is not None:
+        yield current()
+        return
+    timings = RequestTimings()
+    _local.timings = timings
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_db_wrapper))
+            yield timings
+    finally:
+        _local.timings = None
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        timings = current()
+        if timings is None or timings.render_depth:
+            return render(self, *args, **kwargs)
+        timings.render_depth += 1
+        started = time.monotonic()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timings.render_depth -= 1
+            timings.render_ms += (time.monotonic() - started) * 1000
+    return wrapper
+
+
+def _timed_thumbnail(get_thumbnail):
+    @wraps(get_thumbnail)
+    def wrapper(*args, **kwargs):
+        timings = current()
+        if timings is None:
+            return get_thumbnail(*args, **kwargs)
+        started = time.monotonic()
+        try:
+            return get_thumbnail(*args, **kwargs)
+        finally:
+            timings.thumbnail_ms += (time.monotonic() - started) * 1000
+    return wrapper
+
+
+def install():
+    """Оборачивает рендеринг шаблонов и sorl-thumbnail.
+
+    Повторный вызов ничего не делает.
+    """
+    global _installed
+    if _installed:
+        return
+    Template.render = _timed_render(Template.render)
+    ThumbnailBackend.get_thumbnail = _timed_thumbnail(
+        ThumbnailBackend.get_thumbnail)
+    _installed = True
@@ -1,6 +1,12 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
 from http import HTTPStatus
 
+from . import metrics
+from .middleware import load_state
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html',
@@ -12,8 +18,26 @@ def csrf_failure(request, reason=''):
 
 
 def permission_denied(request, exception):
-    return render(request, 'core/403.html', HTTPStatus.FORBIDDEN)
+    return render(request, 'core/403.html', status=HTTPStatus.FORBIDDEN)
 
 
 def server_error(request):
-    return render(request, 'core/500.html', HTTPStatus.INTERNAL_SERVER_ERROR)
+    return render(request, 'core/500.html',
+                  status=HTTPStatus.INTERNAL_SERVER_ERROR)
+
+
+def load_status(request):
+    if request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+        raise PermissionDenied
+    return JsonResponse(load_state.snapshot())
+
+
+def metrics_view(request):
+    if request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+        raise PermissionDenied
+    if not settings.METRICS_DIR:
+        raise Http404
+    return HttpResponse(
+        metrics.render_prometheus(settings.METRICS_DIR),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
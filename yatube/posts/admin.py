@@ -1,7 +1,8 @@
 from django.contrib import admin
 
 from .models import Post
-from .models import Group, Comment, Follow
+from .models import (ArchivedComment, ArchivedPost, Group, Comment, Follow,
+                     TextFingerprint, TrendingScore)
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -16,3 +17,30 @@ admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
 admin.site.register(Comment)
 admin.site.register(Follow)
+
+
+class TextFingerprintAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'kind', 'object_id', 'flagged', 'created')
+    list_filter = ('flagged', 'kind')
+
+
+admin.site.register(TextFingerprint, TextFingerprintAdmin)
+
+
+class TrendingScoreAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'kind', 'object_id', 'score', 'updated')
+    list_filter = ('kind',)
+
+
+admin.site.register(TrendingScore, TrendingScoreAdmin)
+
+
+class ArchivedPostAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    search_fields = ('text',)
+    list_filter = ('pub_date',)
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(ArchivedPost, ArchivedPostAdmin)
+admin.site.register(ArchivedComment)
@@ -0,0 +1,135 @@
+"""Горячие и архивные посты.
+
+Посты старше ARCHIVE_AFTER_DAYS вместе с комментариями переносятся
+пачками по ARCHIVE_BATCH_SIZE в ArchivedPost и ArchivedComment с теми же
+id; каждая пачка — отдельная транзакция, поэтому перенос можно прервать
+и запустить снова. Пачка выбирается по возрастанию pk: старые посты
+лежат в начале таблицы, и сканирование останавливается, набрав пачку.
+
+Ленты читают горячую таблицу и переходят к архиву только на страницах
+за её концом (ArchiveChain). post_detail отдаёт архивный пост по id.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+ARCHIVE_COUNT_TIMEOUT = 60 * 60
+VERSION_KEY = 'archive:version'
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+
+
+def move_batch(post_ids):
+    """Переносит посты post_ids и их комментарии в архив."""
+    ArchivedPost.objects.bulk_create([
+        ArchivedPost(id=post.pk, text=post.text, pub_date=post.pub_date,
+                     author_id=post.author_id, group_id=post.group_id,
+                     image=post.image.name)
+        for post in Post.objects.filter(pk__in=post_ids)
+    ], ignore_conflicts=True)
+    ArchivedComment.objects.bulk_create([
+        ArchivedComment(id=comment.pk, post_id=comment.post_id,
+                        author_id=comment.author_id, text=comment.text,
+                        created=comment.created)
+        for comment in Comment.objects.filter(post_id__in=post_ids)
+    ], ignore_conflicts=True)
+    Post.objects.filter(pk__in=post_ids).delete()
+
+
+def archive(before=None, batch_size=None):
+    """Переносит в архив посты старше before; возвращает их число."""
+    if before is None:
+        before = timezone.now() - timedelta(
+            days=settings.ARCHIVE_AFTER_DAYS)
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    moved = 0
+    while True:
+        with transaction.atomic():
+            post_ids = list(Post.objects.filter(
+                pub_date__lt=before
+            ).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not post_ids:
+                break
+            move_batch(post_ids)
+        moved += len(post_ids)
+    if moved:
+        bump_version()
+    return moved
+
+
+def get_post(post_id):
+    """Горячий или архивный пост; archived=True у архивного."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        post.archived = False
+        return post
+    post = ArchivedPost.objects.filter(pk=post_id).first()
+    if post is None:
+        raise Http404
+    post.archived = True
+    return post
+
+
+class ArchiveChain:
+    """Горячие посты, за ними архивные — список для Paginator.
+
+    Число архивных постов с ключом scope кешируется до следующего
+    переноса; без scope оно считается при каждом запросе.
+    """
+
+    def __init__(self, hot, archived, scope=None):
+        self.hot = hot
+        self.archived = archived
+        self.scope = scope
+        self.hot_count = None
+
+    def archived_count(self):
+        if self.scope is None:
+            return self.archived.count()
+        key = f'archive_count:{get_version()}:{self.scope}'
+        count = cache.get(key)
+        if count is None:
+            count = self.archived.count()
+            cache.set(key, count, ARCHIVE_COUNT_TIMEOUT)
+        return count
+
+    def count(self):
+        if self.hot_count is None:
+            self.hot_count = self.hot.count()
+        return self.hot_count + self.archived_count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if self.hot_count is None:
+            self.hot_count = self.hot.count()
+        start, stop = index.start or 0, index.stop
+        items = []
+        if start < self.hot_count:
+            items.extend(self.hot[start:min(stop, self.hot_count)])
+        if stop > self.hot_count:
+            items.extend(self.archived[max(start - self.hot_count, 0):
+                                       stop - self.hot_count])
+        return items
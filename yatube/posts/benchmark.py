@@ -0,0 +1,198 @@
+"""Нагрузочный прогон всех URL приложения posts на сгенерированных данных.
+
+Авторство постов и подписки распределены по степенному закону:
+несколько авторов пишут большую часть постов и собирают большинство
+подписчиков, как на живом сайте.
+"""
+import random
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from faker import Faker
+from mixer.backend.django import mixer
+
+from . import urls
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BULK_BATCH_SIZE = 1000
+PERCENTILES = (50, 95, 99)
+
+
+def zipf_weights(count, exponent):
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def generate_dataset(users=200, groups=10, posts=2000, follows=3000,
+                     comments=4000, exponent=1.1, seed=0):
+    """Заполняет БД и возвращает сведения для построения URL."""
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    User.objects.bulk_create(
+        [User(username=f'bench_{i}_{fake.user_name()}',
+              first_name=fake.first_name(), last_name=fake.last_name())
+         for i in range(users)],
+        batch_size=BULK_BATCH_SIZE)
+    user_ids = list(User.objects.filter(
+        username__startswith='bench_').values_list('pk', flat=True))
+    weights = zipf_weights(len(user_ids), exponent)
+    group_objects = mixer.cycle(groups).blend(
+        Group, slug=mixer.sequence('bench-group-{0}'))
+    group_ids = [group.pk for group in group_objects] + [None]
+    Post.objects.bulk_create(
+        [Post(author_id=author_id, group_id=rng.choice(group_ids),
+              text=fake.text(max_nb_chars=rng.choice((200, 1000, 5000))))
+         for author_id in rng.choices(user_ids, weights, k=posts)],
+        batch_size=BULK_BATCH_SIZE)
+    pairs = set()
+    for author_id in rng.choices(user_ids, weights, k=follows):
+        user_id = rng.choice(user_ids)
+        if user_id != author_id:
+            pairs.add((user_id, author_id))
+    Follow.objects.bulk_create(
+        [Follow(user_id=user_id, author_id=author_id)
+         for user_id, author_id in pairs],
+        batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+    post_ids = list(Post.objects.filter(
+        author_id__in=user_ids).values_list('pk', flat=True))
+    post_weights = zipf_weights(len(post_ids), exponent)
+    Comment.objects.bulk_create(
+        [Comment(post_id=post_id, author_id=rng.choice(user_ids),
+                 text=fake.sentence())
+         for post_id in rng.choices(post_ids, post_weights, k=comments)],
+        batch_size=BULK_BATCH_SIZE)
+    return {
+        'user_ids': user_ids,
+        'weights': weights,
+        'group_slugs': [group.slug for group in group_objects],
+        'post_ids': post_ids,
+    }
+
+
+class Scenario:
+    """Строит запросы к каждому URL из posts/urls.py."""
+
+    def __init__(self, dataset, seed=0):
+        self.rng = random.Random(seed)
+        self.dataset = dataset
+        self.usernames = dict(User.objects.filter(
+            pk__in=dataset['user_ids']).values_list('pk', 'username'))
+        self.reader = User.objects.filter(
+            pk__in=dataset['user_ids']
+        ).annotate(followees=Count('follower')).order_by('-followees')[0]
+
+    def username(self):
+        user_id = self.rng.choices(
+            self.dataset['user_ids'], self.dataset['weights'])[0]
+        return self.usernames[user_id]
+
+    def post_id(self):
+        return self.rng.choice(self.dataset['post_ids'])
+
+    def own_post_id(self):
+        post = Post.objects.filter(author=self.reader).only('pk').first()
+        if post is None:
+            post = Post.objects.create(author=self.reader, text='benchmark')
+        return post.pk
+
+    def request(self, url_name):
+        """(метод, путь, данные) для очередного запроса к url_name."""
+        builders = {
+            'index': lambda: ('get', {}, None),
+            'index_feed': lambda: ('get', {'feed_format': 'rss'}, None),
+            'group_feed': lambda: (
+                'get', {'slug': self.rng.choice(self.dataset['group_slugs']),
+                        'feed_format': 'atom'}, None),
+            'profile_feed': lambda: (
+                'get', {'username': self.username(), 'feed_format': 'rss'},
+                None),
+            'group_list': lambda: (
+                'get', {'slug': self.rng.choice(self.dataset['group_slugs'])},
+                None),
+            'profile': lambda: ('get', {'username': self.username()}, None),
+            'post_detail': lambda: ('get', {'post_id': self.post_id()}, None),
+            'post_user_state': lambda: (
+                'get', {'post_id': self.post_id()}, None),
+            'post_create': lambda: (
+                'post', {}, {'text': 'Пост из нагрузочного теста'}),
+            'post_edit': lambda: (
+                'post', {'post_id': self.own_post_id()},
+                {'text': 'Отредактировано в нагрузочном тесте'}),
+            'add_comment': lambda: (
+                'post', {'post_id': self.post_id()},
+                {'text': 'Комментарий из нагрузочного теста'}),
+            'trending': lambda: ('get', {}, None),
+            'follow_index': lambda: ('get', {}, None),
+            'profile_follow_batch': lambda: (
+                'post', {}, {'username': [self.username() for _ in range(5)]}),
+            'profile_follow': lambda: (
+                'get', {'username': self.username()}, None),
+            'profile_unfollow': lambda: (
+                'get', {'username': self.username()}, None),
+            'profile_export': lambda: (
+                'get', {'username': self.reader.username}, None),
+        }
+        method, kwargs, data = builders[url_name]()
+        return method, reverse(f'posts:{url_name}', kwargs=kwargs), data
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, -(-len(ordered) * percent // 100) - 1)
+    return ordered[index]
+
+
+def response_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def run(dataset, requests_per_url=50, seed=0):
+    """Прогоняет каждый URL и возвращает статистику по имени URL.
+
+    Прогон идёт на отдельном кеше BENCHMARK_CACHE: его очистка перед
+    каждым URL не трогает сессии, лимиты и фрагменты рабочего кеша.
+    """
+    caches = {**settings.CACHES, 'default': settings.BENCHMARK_CACHE}
+    with override_settings(CACHES=caches):
+        return run_scenario(Scenario(dataset, seed), requests_per_url)
+
+
+def run_scenario(scenario, requests_per_url):
+    client = Client()
+    client.force_login(scenario.reader)
+    results = {}
+    for pattern in urls.urlpatterns:
+        cache.clear()
+        timings, queries, sizes, statuses = [], [], [], Counter()
+        for _ in range(requests_per_url):
+            method, path, data = scenario.request(pattern.name)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(client, method)(path, data)
+                size = response_size(response)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+            sizes.append(size)
+            statuses[response.status_code] += 1
+        results[f'posts:{pattern.name}'] = {
+            **{f'p{percent}_ms': round(percentile(timings, percent), 3)
+               for percent in PERCENTILES},
+            'queries_mean': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+            'bytes_mean': round(sum(sizes) / len(sizes)),
+            'statuses': {str(code): count
+                         for code, count in sorted(statuses.items())},
+        }
+    return results
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def shared_cache_check(app_configs, **kwargs):
+    """Счета популярного сохраняет обработчик run_jobs в другом процессе,
+    поэтому кеш default должен быть общим для процессов."""
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        'Кеш default хранится в памяти процесса: обработчик run_jobs '
+        'не увидит счета популярного и не сохранит их.',
+        hint='Для нескольких процессов нужен Memcached или Redis.',
+        id='posts.W001',
+    )]
@@ -0,0 +1,107 @@
+"""Потоковая выгрузка постов и комментариев автора.
+
+JSON Lines: одна запись на строку, сначала посты, затем комментарии
+автора. В режиме ZIP архив собирается на лету: content.jsonl и файлы
+Post.image складываются в поток кусками, поэтому память не растёт
+с объёмом выгрузки.
+"""
+import json
+import zipfile
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+EXPORT_CHUNK_SIZE = 500
+FILE_CHUNK_SIZE = 64 * 1024
+CONTENT_NAME = 'content.jsonl'
+IMAGES_DIR = 'images/'
+
+
+def post_record(post):
+    return {
+        'type': 'post',
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'group': post.group.slug if post.group_id else None,
+        'image': post.image.name or None,
+    }
+
+
+def comment_record(comment):
+    return {
+        'type': 'comment',
+        'id': comment.pk,
+        'post': comment.post_id,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def iter_records(author):
+    for model in (ArchivedPost, Post):
+        posts = model.objects.filter(author=author).select_related(
+            'group').order_by('pk')
+        for post in posts.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield post_record(post)
+    for model in (ArchivedComment, Comment):
+        comments = model.objects.filter(author=author).order_by('pk')
+        for comment in comments.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield comment_record(comment)
+
+
+def iter_jsonl(author):
+    for record in iter_records(author):
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class StreamBuffer:
+    """Файл без seek для ZipFile: накопленные байты забираются через pop()."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def image_names(author):
+    for model in (ArchivedPost, Post):
+        images = model.objects.filter(author=author).exclude(
+            image='').order_by('pk').values_list('image', flat=True)
+        yield from images.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def iter_zip(author):
+    return (chunk for chunk in _zip_chunks(author) if chunk)
+
+
+def _zip_chunks(author):
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(CONTENT_NAME, 'w') as content:
+            for line in iter_jsonl(author):
+                content.write(line.encode())
+                yield buffer.pop()
+        storage = Post._meta.get_field('image').storage
+        for name in image_names(author):
+            if not storage.exists(name):
+                continue
+            # Картинки уже сжаты, поэтому кладём их без DEFLATE.
+            info = zipfile.ZipInfo(IMAGES_DIR + name)
+            info.compress_type = zipfile.ZIP_STORED
+            with storage.open(name) as source, \
+                    archive.open(info, 'w') as target:
+                for chunk in iter(
+                        lambda: source.read(FILE_CHUNK_SIZE), b''):
+                    target.write(chunk)
+                    yield buffer.pop()
+    yield buffer.pop()
@@ -0,0 +1,164 @@
+"""RSS и Atom ленты главной, групп и авторов.
+
+Каждая лента рендерится один раз на версию содержимого и хранится
+в кеше. Версия (ETag и время изменения) лежит в кеше под ключом ленты
+и сбрасывается сигналами Post, поэтому ответ 304 на If-None-Match или
+If-Modified-Since обходится без запросов к таблице постов.
+"""
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.views.decorators.http import condition
+
+from .models import Group, Post, User
+
+FEED_ITEMS_NUMBER = 20
+FEED_TIMEOUT = 60 * 60
+FEED_TITLE_LENGTH = 50
+FEED_TYPES = {'rss': Rss201rev2Feed, 'atom': Atom1Feed}
+
+
+def version_key(scope):
+    return f'feed_version:{scope}'
+
+
+def get_version(scope):
+    """Текущая версия ленты; создаётся заново после сброса."""
+    key = version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, {'etag': uuid.uuid4().hex, 'modified': time.time()},
+                  FEED_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(post):
+    """Сбрасывает ленты поста, включая ленту группы, из которой его
+    перенесли."""
+    group_ids = {post.group_id, getattr(post, 'saved_group_id', None)}
+    cache.delete_many([
+        version_key('index'),
+        version_key(f'author:{post.author_id}'),
+        *[version_key(f'group:{group_id}') for group_id in group_ids],
+    ])
+    post.saved_group_id = post.group_id
+
+
+class PostsFeed(Feed):
+    title = 'Yatube: последние обновления'
+    description = 'Новые посты на Yatube'
+
+    def __init__(self, feed_type):
+        self.feed_type = feed_type
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.get_posts(obj).select_related(
+            'author')[:FEED_ITEMS_NUMBER]
+
+    def item_title(self, item):
+        return item.text[:FEED_TITLE_LENGTH]
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', args=[obj.slug])
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Посты пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=[obj.username])
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+def cached_feed(feed_class, get_scope):
+    """View ленты с кешем по версии и условными ответами."""
+    def version(request, feed_format, **kwargs):
+        if feed_format not in FEED_TYPES:
+            raise Http404
+        if not hasattr(request, 'feed_version'):
+            scope = get_scope(**kwargs)
+            request.feed_version = scope, get_version(scope)
+        return request.feed_version
+
+    def etag(request, feed_format, **kwargs):
+        _, current = version(request, feed_format, **kwargs)
+        return f'{current["etag"]}-{feed_format}'
+
+    def last_modified(request, feed_format, **kwargs):
+        _, current = version(request, feed_format, **kwargs)
+        return datetime.fromtimestamp(int(current['modified']), timezone.utc)
+
+    @condition(etag_func=etag, last_modified_func=last_modified)
+    def view(request, feed_format, **kwargs):
+        scope, current = version(request, feed_format, **kwargs)
+        key = f'feed:{scope}:{feed_format}:{current["etag"]}'
+        cached = cache.get(key)
+        if cached is None:
+            response = feed_class(FEED_TYPES[feed_format])(request, **kwargs)
+            cached = (response.content, response['Content-Type'])
+            cache.set(key, cached, FEED_TIMEOUT)
+        content, content_type = cached
+        return HttpResponse(content, content_type=content_type)
+    return view
+
+
+def group_scope(slug):
+    return f'group:{get_object_or_404(Group, slug=slug).pk}'
+
+
+def author_scope(username):
+    return f'author:{get_object_or_404(User, username=username).pk}'
+
+
+index_feed = cached_feed(PostsFeed, lambda: 'index')
+group_feed = cached_feed(GroupFeed, group_scope)
+profile_feed = cached_feed(AuthorFeed, author_scope)
@@ -0,0 +1,67 @@
+"""Кеш подписок: для каждого пользователя — отсортированный массив id авторов.
+
+Проверка подписки — бинарный поиск по массиву из кеша, без запросов к БД.
+Изменения подписок сбрасывают массив целиком, а не правят его: правка
+«прочитать — изменить — записать» теряла бы одновременные изменения.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from .models import Follow
+
+FOLLOW_GRAPH_TIMEOUT = 60 * 60
+TYPECODE = 'q'
+
+
+def followees_key(user_id):
+    return f'follow_graph:{user_id}'
+
+
+def _load(user_id):
+    author_ids = Follow.objects.filter(user_id=user_id).order_by(
+        'author_id').values_list('author_id', flat=True)
+    return array(TYPECODE, author_ids)
+
+
+def _store(user_id, followees):
+    cache.add(followees_key(user_id), followees.tobytes(),
+              FOLLOW_GRAPH_TIMEOUT)
+
+
+def _cached(user_id):
+    data = cache.get(followees_key(user_id))
+    if data is None:
+        return None
+    followees = array(TYPECODE)
+    followees.frombytes(data)
+    return followees
+
+
+def get_followees(user_id):
+    followees = _cached(user_id)
+    if followees is None:
+        followees = _load(user_id)
+        _store(user_id, followees)
+    return followees
+
+
+def _contains(followees, author_id):
+    index = bisect_left(followees, author_id)
+    return index < len(followees) and followees[index] == author_id
+
+
+def is_following(user_id, author_id):
+    return _contains(get_followees(user_id), author_id)
+
+
+def following_many(user_id, author_ids):
+    """Возвращает множество авторов из author_ids, на которых подписан user."""
+    followees = get_followees(user_id)
+    return {author_id for author_id in author_ids
+            if _contains(followees, author_id)}
+
+
+def invalidate(user_id):
+    cache.delete(followees_key(user_id))
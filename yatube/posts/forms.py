@@ -1,7 +1,30 @@
 from django import forms
+from django.conf import settings
 
+from core.moderation import find_forbidden
+
+from . import spam
 from .models import Post, Comment
 
+FORBIDDEN_MESSAGE = 'Это слово использовать нельзя!'
+SPAM_MESSAGE = 'Слишком много похожих сообщений, попробуйте позже.'
+
+
+def check_text(text):
+    if find_forbidden(text):
+        raise forms.ValidationError(FORBIDDEN_MESSAGE)
+    return text
+
+
+def check_spam(instance, text):
+    """Проверяет новую запись на повторы; вердикт сохранит сигнал."""
+    if not instance._state.adding:
+        return
+    verdict = spam.check(text)
+    if verdict.is_spam and settings.SPAM_ACTION == 'reject':
+        raise forms.ValidationError(SPAM_MESSAGE)
+    instance.spam_verdict = verdict
+
 
 class PostForm(forms.ModelForm):
     class Meta:
@@ -9,15 +32,17 @@ class PostForm(forms.ModelForm):
         fields = ('text', 'group', 'image')
 
     def clean_text(self):
-        data = self.cleaned_data['text']
-        if 'Инстаграм' in data.lower():
-            raise forms.ValidationError('Это слово использовать нельзя!')
-        elif 'Отстой' in data.lower():
-            raise forms.ValidationError('Это слово использовать нельзя!')
-        return data
+        text = check_text(self.cleaned_data['text'])
+        check_spam(self.instance, text)
+        return text
 
 
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+    def clean_text(self):
+        text = check_text(self.cleaned_data['text'])
+        check_spam(self.instance, text)
+        return text
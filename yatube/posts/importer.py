@@ -0,0 +1,297 @@
+"""Потоковый импорт постов, комментариев и подписок из JSONL или CSV.
+
+Каждая строка — запись одного из типов:
+
+    {"type": "post", "id": "p1", "author": "leo", "group": "cats",
+     "text": "...", "pub_date": "2020-01-01T10:00:00+00:00"}
+    {"type": "comment", "post": "p1", "author": "ann", "text": "..."}
+    {"type": "follow", "user": "ann", "author": "leo"}
+
+В CSV те же поля — колонки. Комментарии ссылаются на посты из того же
+файла по "id". Записи обрабатываются порциями по chunk_size, каждая
+порция — одна транзакция. Порция блокирует вставку в таблицы постов
+и комментариев до своего конца и раздаёт id после Max(pk) сама, поэтому
+id постов известны без повторного чтения; даты из файла проставляются
+update() после вставки, так как auto_now_add перезаписывает их. После
+порции в чекпоинт пишется число обработанных записей и первый id поста
+порции, так что повторный запуск продолжает с места сбоя. Сигналы
+post_save не вызываются: фрагменты постов, подписки и версии лент
+сбрасываются одним delete_many в конце, счётчики архива — сменой его
+версии.
+"""
+import csv
+import json
+import os
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Case, DateTimeField, Max, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import archive, feeds
+from .follow_graph import followees_key
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+CHUNK_SIZE = 20000
+LOOKUP_BATCH_SIZE = 500
+DATE_BATCH_SIZE = 300
+
+
+def read_records(path):
+    """Записи файла по одной, не загружая его в память."""
+    with open(path, encoding='utf-8', newline='') as source:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(source):
+                yield {key: value or None for key, value in row.items()}
+            return
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+
+
+def chunks(records, size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_date(value):
+    return (parse_datetime(value) if value else None) or timezone.now()
+
+
+def is_valid_post(record):
+    return bool(record.get('author') and record.get('text'))
+
+
+def lock_for_insert(models):
+    """До конца транзакции не даёт другим вставлять строки в models.
+
+    SQLite блокирует всю базу на запись с первой пишущей инструкцией,
+    PostgreSQL — таблицу по LOCK TABLE.
+    """
+    with connection.cursor() as cursor:
+        for model in models:
+            table = connection.ops.quote_name(model._meta.db_table)
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f'LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE')
+            else:
+                column = connection.ops.quote_name(model._meta.pk.column)
+                cursor.execute(
+                    f'UPDATE {table} SET {column} = {column} WHERE 1 = 0')
+
+
+def next_pk(model):
+    return (model.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0) + 1
+
+
+def restore_dates(model, field, dates):
+    """Записывает даты {pk: дата} в поле field одним UPDATE на пачку."""
+    dates = list(dates.items())
+    for start in range(0, len(dates), DATE_BATCH_SIZE):
+        batch = dict(dates[start:start + DATE_BATCH_SIZE])
+        model.objects.filter(pk__in=batch).update(**{field: Case(
+            *[When(pk=pk, then=Value(date, output_field=DateTimeField()))
+              for pk, date in batch.items()],
+            output_field=DateTimeField(),
+        )})
+
+
+class Checkpoint:
+    """Сколько записей уже импортировано и с какого id начиналась
+    каждая порция постов."""
+
+    def __init__(self, path, chunk_size):
+        self.path = path
+        self.records = 0
+        self.chunk_size = chunk_size
+        self.post_blocks = []
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as checkpoint_file:
+                state = json.load(checkpoint_file)
+            self.records = state['records']
+            self.chunk_size = state['chunk_size']
+            self.post_blocks = state['post_blocks']
+
+    def save(self, records, first_post_pk):
+        self.records = records
+        self.post_blocks.append(first_post_pk)
+        if not self.path:
+            return
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as checkpoint_file:
+            json.dump({'records': self.records,
+                       'chunk_size': self.chunk_size,
+                       'post_blocks': self.post_blocks}, checkpoint_file)
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Importer:
+    def __init__(self, checkpoint_path=None, batch_size=BATCH_SIZE,
+                 chunk_size=CHUNK_SIZE):
+        self.batch_size = batch_size
+        self.checkpoint = Checkpoint(checkpoint_path, chunk_size)
+        self.user_ids = {}
+        self.group_ids = {}
+        self.post_ids = {}
+        self.touched_posts = set()
+        self.touched_followers = set()
+        self.touched_authors = set()
+        self.touched_groups = set()
+        self.counts = {'post': 0, 'comment': 0, 'follow': 0, 'skipped': 0}
+
+    def run(self, path):
+        records = read_records(path)
+        chunk_size = self.checkpoint.chunk_size
+        done = self.checkpoint.records
+        self.restore_post_ids(islice(records, done), chunk_size)
+        for chunk in chunks(records, chunk_size):
+            with transaction.atomic():
+                first_post_pk = self.import_chunk(chunk)
+            done += len(chunk)
+            self.checkpoint.save(done, first_post_pk)
+        self.invalidate_cache()
+        self.checkpoint.remove()
+        return self.counts
+
+    def restore_post_ids(self, records, chunk_size):
+        """Восстанавливает id постов из порций, импортированных ранее."""
+        for first_post_pk, chunk in zip(self.checkpoint.post_blocks,
+                                        chunks(records, chunk_size)):
+            posts = [record for record in chunk
+                     if record['type'] == 'post' and is_valid_post(record)]
+            for offset, record in enumerate(posts):
+                self.post_ids[str(record['id'])] = first_post_pk + offset
+
+    def resolve(self, model, field, names, ids, defaults):
+        """Дополняет ids значениями из БД, создавая недостающие записи."""
+        missing = list({name for name in names if name not in ids})
+        for start in range(0, len(missing), LOOKUP_BATCH_SIZE):
+            batch = missing[start:start + LOOKUP_BATCH_SIZE]
+            found = dict(model.objects.filter(
+                **{f'{field}__in': batch}).values_list(field, 'pk'))
+            new = [model(**{field: name}, **defaults(name))
+                   for name in batch if name not in found]
+            if new:
+                model.objects.bulk_create(new, batch_size=self.batch_size)
+                found.update(model.objects.filter(
+                    **{f'{field}__in': [getattr(obj, field) for obj in new]}
+                ).values_list(field, 'pk'))
+            ids.update(found)
+
+    def resolve_names(self, chunk):
+        usernames, slugs = [], []
+        for record in chunk:
+            for key in ('author', 'user'):
+                if record.get(key):
+                    usernames.append(record[key])
+            if record['type'] == 'post' and record.get('group'):
+                slugs.append(record['group'])
+        self.resolve(User, 'username', usernames, self.user_ids,
+                     lambda name: {'password': make_password(None)})
+        self.resolve(Group, 'slug', slugs, self.group_ids,
+                     lambda slug: {'title': slug, 'description': ''})
+
+    def import_chunk(self, chunk):
+        self.resolve_names(chunk)
+        lock_for_insert([Post, Comment])
+        self.next_pks = {Post: next_pk(Post), Comment: next_pk(Comment)}
+        first_post_pk = self.next_pks[Post]
+        self.dates = {Post: {}, Comment: {}}
+        rows = {Post: [], Comment: [], Follow: []}
+        builders = {'post': self.build_post, 'comment': self.build_comment,
+                    'follow': self.build_follow}
+        for record in chunk:
+            builder = builders.get(record['type'])
+            row = builder(record) if builder else None
+            if row is None:
+                self.counts['skipped'] += 1
+                continue
+            rows[type(row)].append(row)
+        for model, objs in rows.items():
+            model.objects.bulk_create(objs, batch_size=self.batch_size,
+                                      ignore_conflicts=model is Follow)
+        restore_dates(Post, 'pub_date', self.dates[Post])
+        restore_dates(Comment, 'created', self.dates[Comment])
+        self.reset_sequences()
+        self.counts['post'] += len(rows[Post])
+        self.counts['comment'] += len(rows[Comment])
+        self.counts['follow'] += len(rows[Follow])
+        return first_post_pk
+
+    def take_pk(self, model, date):
+        pk = self.next_pks[model]
+        self.next_pks[model] += 1
+        if date:
+            self.dates[model][pk] = parse_date(date)
+        return pk
+
+    def build_post(self, record):
+        if not is_valid_post(record):
+            return None
+        pk = self.take_pk(Post, record.get('pub_date'))
+        self.post_ids[str(record['id'])] = pk
+        post = Post(pk=pk, author_id=self.user_ids[record['author']],
+                    group_id=self.group_ids.get(record.get('group')),
+                    text=record['text'])
+        self.touched_authors.add(post.author_id)
+        if post.group_id is not None:
+            self.touched_groups.add(post.group_id)
+        return post
+
+    def build_comment(self, record):
+        post_id = self.post_ids.get(str(record.get('post')))
+        if (post_id is None or not record.get('author')
+                or not record.get('text')):
+            return None
+        self.touched_posts.add(post_id)
+        return Comment(pk=self.take_pk(Comment, record.get('created')),
+                       post_id=post_id,
+                       author_id=self.user_ids[record['author']],
+                       text=record['text'])
+
+    def build_follow(self, record):
+        user_id = self.user_ids.get(record.get('user'))
+        author_id = self.user_ids.get(record.get('author'))
+        if user_id is None or author_id is None or user_id == author_id:
+            return None
+        self.touched_followers.add(user_id)
+        return Follow(user_id=user_id, author_id=author_id)
+
+    def reset_sequences(self):
+        """Сдвигает последовательности id за вставленные явно."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Post, Comment])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def invalidate_cache(self):
+        keys = [make_template_fragment_key('post_detail', [post_id])
+                for post_id in self.touched_posts]
+        keys += [followees_key(user_id)
+                 for user_id in self.touched_followers]
+        if self.touched_authors:
+            keys.append(feeds.version_key('index'))
+        keys += [feeds.version_key(f'author:{author_id}')
+                 for author_id in self.touched_authors]
+        keys += [feeds.version_key(f'group:{group_id}')
+                 for group_id in self.touched_groups]
+        cache.delete_many(keys)
+        archive.bump_version()
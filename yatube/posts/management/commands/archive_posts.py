@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import archive
+
+
+class Command(BaseCommand):
+    help = ('Переносит посты старше ARCHIVE_AFTER_DAYS дней и их '
+            'комментарии в архивные таблицы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            help='Возраст вместо ARCHIVE_AFTER_DAYS')
+        parser.add_argument('--batch-size', type=int,
+                            help='Размер пачки вместо ARCHIVE_BATCH_SIZE')
+
+    def handle(self, *args, **options):
+        days = options['days'] or settings.ARCHIVE_AFTER_DAYS
+        moved = archive.archive(
+            before=timezone.now() - timedelta(days=days),
+            batch_size=options['batch_size'])
+        self.stdout.write(f'Перенесено в архив постов: {moved}')
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from posts import spam
+from posts.models import Comment, Post, TextFingerprint
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = ('Считает SimHash для постов и комментариев без отпечатка; '
+            'повторный запуск продолжает с оставшихся записей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        sources = (
+            (TextFingerprint.POST, Post, 'pub_date'),
+            (TextFingerprint.COMMENT, Comment, 'created'),
+        )
+        for kind, model, date_field in sources:
+            rows = model.objects.annotate(has_fingerprint=Exists(
+                TextFingerprint.objects.filter(
+                    kind=kind, object_id=OuterRef('pk'))
+            )).filter(has_fingerprint=False).order_by(
+                'pk').values_list('pk', 'text', date_field)
+            last_id, created = 0, 0
+            while True:
+                batch = [
+                    spam.make_fingerprint(
+                        kind, pk, spam.simhash(text), created=date)
+                    for pk, text, date in rows.filter(
+                        pk__gt=last_id)[:options['batch_size']]
+                ]
+                if not batch:
+                    break
+                TextFingerprint.objects.bulk_create(
+                    batch, ignore_conflicts=True)
+                created += len(batch)
+                last_id = batch[-1].object_id
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {created}')
@@ -0,0 +1,76 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from posts import benchmark
+
+UNLIMITED_RATE = {'user': '1000000/s', 'ip': '1000000/s'}
+
+
+class Command(BaseCommand):
+    help = ('Генерирует данные в отдельной тестовой БД и замеряет '
+            'задержку, число запросов и размер ответа для URL posts.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--follows', type=int, default=3000)
+        parser.add_argument('--comments', type=int, default=4000)
+        parser.add_argument('--exponent', type=float, default=1.1,
+                            help='Показатель степенного распределения')
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов на каждый URL')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Куда сохранить JSON')
+        parser.add_argument('--compare', help='JSON прошлого прогона')
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True)
+        try:
+            with override_settings(THROTTLE_RATES={
+                scope: UNLIMITED_RATE
+                for scope in ('post_create', 'add_comment', 'profile_follow')
+            }):
+                dataset = benchmark.generate_dataset(
+                    users=options['users'], groups=options['groups'],
+                    posts=options['posts'], follows=options['follows'],
+                    comments=options['comments'],
+                    exponent=options['exponent'], seed=options['seed'])
+                results = benchmark.run(
+                    dataset, options['requests'], options['seed'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        report = {
+            'config': {key: options[key] for key in (
+                'users', 'groups', 'posts', 'follows', 'comments',
+                'exponent', 'requests', 'seed')},
+            'results': results,
+        }
+        previous = {}
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as report_file:
+                previous = json.load(report_file)['results']
+        self.print_results(results, previous)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+
+    def print_results(self, results, previous):
+        self.stdout.write(
+            f'{"URL":<30}{"p50 мс":>10}{"p95 мс":>10}{"p99 мс":>10}'
+            f'{"запросов":>10}{"байт":>10}')
+        for url_name, result in results.items():
+            line = (f'{url_name:<30}{result["p50_ms"]:>10.2f}'
+                    f'{result["p95_ms"]:>10.2f}{result["p99_ms"]:>10.2f}'
+                    f'{result["queries_mean"]:>10.1f}'
+                    f'{result["bytes_mean"]:>10}')
+            old = previous.get(url_name)
+            if old:
+                p95 = result['p95_ms'] - old['p95_ms']
+                queries = result['queries_mean'] - old['queries_mean']
+                line += f'  p95 {p95:+.2f} мс, запросов {queries:+.1f}'
+            self.stdout.write(line)
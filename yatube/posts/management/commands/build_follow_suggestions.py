@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import recommendations
+from posts.models import FollowSuggestion
+
+INSERT_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации подписок «друзья друзей».'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int,
+                            default=recommendations.TOP_K)
+        parser.add_argument('--batch-size', type=int,
+                            default=recommendations.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        user_ids, adjacency = recommendations.load_follow_graph()
+        candidates = recommendations.second_degree_top_k(
+            adjacency, options['top_k'], options['batch_size'])
+        created = 0
+        with transaction.atomic():
+            FollowSuggestion.objects.all().delete()
+            batch = []
+            for row, column, score in candidates:
+                batch.append(FollowSuggestion(
+                    user_id=int(user_ids[row]),
+                    author_id=int(user_ids[column]),
+                    score=score,
+                ))
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    FollowSuggestion.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            FollowSuggestion.objects.bulk_create(batch)
+            created += len(batch)
+        self.stdout.write(
+            f'Пользователей в графе: {len(user_ids)}, '
+            f'рекомендаций: {created}')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import sitemaps
+
+
+class Command(BaseCommand):
+    help = ('Перестраивает изменившиеся gzip-шарды карты сайта '
+            'и индекс sitemap.xml в SITEMAP_ROOT.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help='Каталог вместо SITEMAP_ROOT')
+        parser.add_argument('--base-url',
+                            help='Адрес сайта вместо SITEMAP_BASE_URL')
+        parser.add_argument('--shard-size', type=int)
+        parser.add_argument('--force', action='store_true',
+                            help='Перезаписать все шарды')
+
+    def handle(self, *args, **options):
+        written = sitemaps.build(
+            directory=options['dir'], base_url=options['base_url'],
+            size=options['shard_size'], force=options['force'])
+        self.stdout.write(f'Перезаписано шардов: {len(written)}')
+        for name in written:
+            self.stdout.write(f'  {name}')
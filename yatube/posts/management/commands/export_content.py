@@ -0,0 +1,37 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты и комментарии автора в JSON Lines или ZIP.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--output',
+                            help='Файл выгрузки (по умолчанию stdout)')
+        parser.add_argument('--zip', action='store_true',
+                            help='ZIP с content.jsonl и картинками постов')
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден')
+        if options['zip']:
+            chunks = export.iter_zip(author)
+        else:
+            chunks = (line.encode() for line in export.iter_jsonl(author))
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from posts import importer
+
+
+class Command(BaseCommand):
+    help = ('Импортирует посты, комментарии и подписки из JSONL или CSV '
+            'порциями; после сбоя повторный запуск продолжает с чекпоинта.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .jsonl или .csv')
+        parser.add_argument('--checkpoint',
+                            help='Файл чекпоинта (по умолчанию '
+                                 '<path>.checkpoint)')
+        parser.add_argument('--batch-size', type=int,
+                            default=importer.BATCH_SIZE)
+        parser.add_argument('--chunk-size', type=int,
+                            default=importer.CHUNK_SIZE,
+                            help='Записей в одной транзакции')
+
+    def handle(self, *args, **options):
+        counts = importer.Importer(
+            checkpoint_path=(options['checkpoint']
+                             or options['path'] + '.checkpoint'),
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size'],
+        ).run(options['path'])
+        self.stdout.write(
+            f'Постов: {counts["post"]}, комментариев: {counts["comment"]}, '
+            f'подписок: {counts["follow"]}, пропущено: {counts["skipped"]}')
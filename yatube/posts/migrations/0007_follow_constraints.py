@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:26
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+def remove_invalid_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Follow.objects.filter(user=models.F('author')).delete()
+    seen = set()
+    for follow in Follow.objects.order_by('pk').iterator():
+        key = (follow.user_id, follow.author_id)
+        if key in seen:
+            follow.delete()
+        seen.add(key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_follow'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_invalid_follows,
+                             migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='follow',
+            options={'verbose_name': 'Подписка', 'verbose_name_plural': 'Подписки'},
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.CheckConstraint(check=models.Q(_negated=True, author=django.db.models.expressions.F('user')), name='can_not_subscribe_to_yourself'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_subscription'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:56
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextFingerprint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=10, verbose_name='Тип')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id записи')),
+                ('simhash', models.BigIntegerField(verbose_name='SimHash')),
+                ('band0', models.PositiveIntegerField()),
+                ('band1', models.PositiveIntegerField()),
+                ('band2', models.PositiveIntegerField()),
+                ('band3', models.PositiveIntegerField()),
+                ('band4', models.PositiveIntegerField()),
+                ('band5', models.PositiveIntegerField()),
+                ('flagged', models.BooleanField(default=False, verbose_name='На проверку')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Создан')),
+            ],
+            options={
+                'verbose_name': 'Отпечаток текста',
+                'verbose_name_plural': 'Отпечатки текстов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='textfingerprint',
+            index=models.Index(fields=['band0', 'created'], name='fingerprint_band0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='textfingerprint',
+            index=models.Index(fields=['band1', 'created'], name='fingerprint_band1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='textfingerprint',
+            index=models.Index(fields=['band2', 'created'], name='fingerprint_band2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='textfingerprint',
+            index=models.Index(fields=['band3', 'created'], name='fingerprint_band3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='textfingerprint',
+            index=models.Index(fields=['band4', 'created'], name='fingerprint_band4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='textfingerprint',
+            index=models.Index(fields=['band5', 'created'], name='fingerprint_band5_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='textfingerprint',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_fingerprint'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:03
+
+from django.db import migrations
+import posts.models
+
+BATCH_SIZE = 1000
+
+
+def fill_excerpts(apps, schema_editor):
+    for model_name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', model_name)
+        batch = []
+        for post in model.objects.only('text').iterator(
+                chunk_size=BATCH_SIZE):
+            post.excerpt = posts.models.make_excerpt(post.text)
+            batch.append(post)
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_update(batch, ['excerpt'])
+                batch = []
+        model.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='excerpt',
+            field=posts.models.ExcerptField(blank=True, editable=False, max_length=301, source='text', verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=posts.models.ExcerptField(blank=True, editable=False, max_length=301, source='text', verbose_name='Начало текста'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,52 @@
-from django.db import models
+from django.db import connection, models
+from django.db.models.signals import post_save
+from django.utils import timezone
 
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 POST_SYMBOLS_NUMBER = 15
+FOLLOW_BATCH_SIZE = 500
+EXCERPT_LENGTH = 300
+ELLIPSIS = '…'
+
+
+def make_excerpt(text):
+    """Начало текста до EXCERPT_LENGTH символов, обрезанное по слову."""
+    if len(text) <= EXCERPT_LENGTH:
+        return text
+    cut = text[:EXCERPT_LENGTH]
+    space = cut.rfind(' ')
+    if space > EXCERPT_LENGTH // 2:
+        cut = cut[:space]
+    return cut.rstrip() + ELLIPSIS
+
+
+class ExcerptField(models.CharField):
+    """Начало текста из поля source; пересчитывается при каждом сохранении.
+
+    Считается в pre_save, поэтому работает и для bulk_create.
+    """
+
+    def __init__(self, *args, source='text', **kwargs):
+        self.source = source
+        kwargs.setdefault('max_length', EXCERPT_LENGTH + len(ELLIPSIS))
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        if self.source in model_instance.get_deferred_fields():
+            return getattr(model_instance, self.attname)
+        value = make_excerpt(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
 
 
 class Group(models.Model):
@@ -24,6 +66,7 @@ class Group(models.Model):
 
 class Post(models.Model):
     text = models.TextField('Текст')
+    excerpt = ExcerptField('Начало текста')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
     author = models.ForeignKey(
         User,
@@ -53,6 +96,75 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:POST_SYMBOLS_NUMBER]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает группу из БД: при переносе поста в другую группу
+        сигналы сбрасывают и ленту прежней."""
+        post = super().from_db(db, field_names, values)
+        post.saved_group_id = post.__dict__.get('group_id')
+        return post
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is not None and 'text' in update_fields:
+            update_fields = {*update_fields, 'excerpt'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+    @property
+    def is_truncated(self):
+        return self.excerpt.endswith(ELLIPSIS)
+
+
+def supports_returning():
+    """Умеет ли БД INSERT ... RETURNING (SQLite с 3.35)."""
+    if connection.vendor == 'postgresql':
+        return True
+    return (connection.vendor == 'sqlite'
+            and connection.Database.sqlite_version_info >= (3, 35))
+
+
+class CommentQuerySet(models.QuerySet):
+    def create_if_post_exists(self, comment):
+        """Сохраняет новый комментарий одним INSERT ... SELECT.
+
+        Строка вставляется, только если пост comment.post_id существует;
+        возвращает False, если поста нет. Где есть RETURNING, тот же
+        запрос отдаёт group_id поста в comment.post_group_id для
+        популярного. Запись идёт мимо save(), поэтому post_save
+        отправляется здесь.
+        """
+        comment.created = timezone.now()
+        table = self.model._meta.db_table
+        posts = Post._meta.db_table
+        sql = (
+            f'INSERT INTO {table} (post_id, author_id, text, created) '
+            f'SELECT id, %s, %s, %s FROM {posts} WHERE id = %s'
+        )
+        created = self.model._meta.get_field('created').get_db_prep_value(
+            comment.created, connection)
+        params = [comment.author_id, comment.text, created, comment.post_id]
+        returning = supports_returning()
+        if returning:
+            sql += (f' RETURNING id, '
+                    f'(SELECT group_id FROM {posts} WHERE id = %s)')
+            params.append(comment.post_id)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            if returning:
+                rows = cursor.fetchall()
+                if not rows:
+                    return False
+                comment.pk, comment.post_group_id = rows[0]
+            elif not cursor.rowcount:
+                return False
+            else:
+                comment.pk = connection.ops.last_insert_id(
+                    cursor, table, 'id')
+        comment._state.adding = False
+        comment._state.db = self.db
+        post_save.send(sender=self.model, instance=comment, created=True,
+                       update_fields=None, raw=False, using=self.db)
+        return True
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -71,6 +183,8 @@ class Comment(models.Model):
     created = models.DateTimeField('Дата и время публикации',
                                    auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ('-created',)
         verbose_name = 'Комментарий'
@@ -80,6 +194,114 @@ class Comment(models.Model):
         return self.text
 
 
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из Post в архив (см. posts.archive)."""
+
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст')
+    excerpt = ExcerptField('Начало текста')
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True
+    )
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:POST_SYMBOLS_NUMBER]
+
+    @property
+    def is_truncated(self):
+        return self.excerpt.endswith(ELLIPSIS)
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField('Текст')
+    created = models.DateTimeField('Дата и время публикации')
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+    def __str__(self):
+        return self.text
+
+
+class FollowQuerySet(models.QuerySet):
+    def follow(self, user, username):
+        """Подписывает user на автора одним запросом, повтор игнорируется."""
+        sql = (
+            f'INSERT INTO {self.model._meta.db_table} (user_id, author_id) '
+            f'SELECT %s, id FROM {User._meta.db_table} '
+            f'WHERE username = %s AND id <> %s '
+            f'ON CONFLICT DO NOTHING'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user.pk, username, user.pk])
+            return cursor.rowcount
+
+    def unfollow(self, user, username):
+        """Отписывает user от автора одним запросом."""
+        sql = (
+            f'DELETE FROM {self.model._meta.db_table} '
+            f'WHERE user_id = %s AND author_id IN '
+            f'(SELECT id FROM {User._meta.db_table} WHERE username = %s)'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user.pk, username])
+            return cursor.rowcount
+
+    def follow_many(self, user, usernames):
+        """Подписывает user на авторов; возвращает число новых подписок."""
+        author_ids = list(User.objects.filter(
+            username__in=usernames
+        ).exclude(pk=user.pk).values_list('pk', flat=True))
+        existing = self.filter(user=user, author_id__in=author_ids).count()
+        self.bulk_create(
+            [self.model(user=user, author_id=author_id)
+             for author_id in author_ids],
+            batch_size=FOLLOW_BATCH_SIZE, ignore_conflicts=True)
+        return len(author_ids) - existing
+
+    def unfollow_many(self, user, usernames):
+        deleted, _ = self.filter(
+            user=user, author__username__in=usernames).delete()
+        return deleted
+
+
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
@@ -92,6 +314,8 @@ class Follow(models.Model):
         related_name='following'
     )
 
+    objects = FollowQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
@@ -105,3 +329,87 @@ class Follow(models.Model):
 
     def __str__(self):
         return self.author
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.PositiveIntegerField('Общих подписок')
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'Рекомендация подписки'
+        verbose_name_plural = 'Рекомендации подписок'
+        indexes = [
+            models.Index(fields=['user', '-score'],
+                         name='suggestion_user_score_idx'),
+        ]
+
+
+class TextFingerprint(models.Model):
+    """SimHash текста поста или комментария, разбитый на полосы для LSH."""
+
+    POST = 'post'
+    COMMENT = 'comment'
+    KIND_CHOICES = ((POST, 'Пост'), (COMMENT, 'Комментарий'))
+
+    kind = models.CharField('Тип', max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField('id записи')
+    simhash = models.BigIntegerField('SimHash')
+    band0 = models.PositiveIntegerField()
+    band1 = models.PositiveIntegerField()
+    band2 = models.PositiveIntegerField()
+    band3 = models.PositiveIntegerField()
+    band4 = models.PositiveIntegerField()
+    band5 = models.PositiveIntegerField()
+    flagged = models.BooleanField('На проверку', default=False)
+    created = models.DateTimeField('Создан', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Отпечаток текста'
+        verbose_name_plural = 'Отпечатки текстов'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'],
+                                    name='unique_fingerprint'),
+        ]
+        indexes = [
+            models.Index(fields=[f'band{number}', 'created'],
+                         name=f'fingerprint_band{number}_idx')
+            for number in range(6)
+        ]
+
+    def __str__(self):
+        return f'{self.kind} #{self.object_id}'
+
+
+class TrendingScore(models.Model):
+    """Сохранённый счёт из топа популярного (см. posts.trending)."""
+
+    POST = 'post'
+    GROUP = 'group'
+    KIND_CHOICES = ((POST, 'Пост'), (GROUP, 'Группа'))
+
+    kind = models.CharField('Тип', max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField('id объекта')
+    score = models.FloatField('Логарифм счёта')
+    updated = models.DateTimeField('Обновлён', auto_now=True)
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'Счёт популярности'
+        verbose_name_plural = 'Счета популярности'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'],
+                                    name='unique_trending_score'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} #{self.object_id}'
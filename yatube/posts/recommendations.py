@@ -0,0 +1,62 @@
+"""Рекомендации подписок «друзья друзей» на разреженных матрицах.
+
+Граф подписок — матрица смежности A (подписчик x автор). Строка A @ A
+для пользователя содержит число путей длины 2 до каждого автора:
+сколько его подписок подписаны на этого автора.
+"""
+import numpy as np
+from scipy import sparse
+
+from .models import Follow
+
+TOP_K = 10
+BATCH_SIZE = 1000
+
+
+def load_follow_graph(chunk_size=10000):
+    """Загружает Follow в CSR-матрицу и массив id пользователей."""
+    pairs = np.fromiter(
+        (value for pair in Follow.objects.values_list(
+            'user_id', 'author_id').iterator(chunk_size=chunk_size)
+         for value in pair),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    user_ids, indices = np.unique(pairs, return_inverse=True)
+    indices = indices.reshape(-1, 2)
+    size = len(user_ids)
+    adjacency = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.int32),
+         (indices[:, 0], indices[:, 1])),
+        shape=(size, size),
+    )
+    return user_ids, adjacency
+
+
+def second_degree_top_k(adjacency, top_k=TOP_K, batch_size=BATCH_SIZE):
+    """Для каждой строки выдаёт (строка, столбец, число общих подписок).
+
+    Уже существующие подписки и сам пользователь из кандидатов исключаются.
+    """
+    size = adjacency.shape[0]
+    for start in range(0, size, batch_size):
+        stop = min(start + batch_size, size)
+        rows = adjacency[start:stop]
+        scores = (rows @ adjacency).tocsr()
+        known = rows + sparse.csr_matrix(
+            (np.ones(stop - start, dtype=np.int32),
+             (np.arange(stop - start), np.arange(start, stop))),
+            shape=rows.shape,
+        )
+        scores = scores - scores.multiply(known.astype(bool))
+        scores.eliminate_zeros()
+        for offset in range(stop - start):
+            begin, end = scores.indptr[offset], scores.indptr[offset + 1]
+            if begin == end:
+                continue
+            columns = scores.indices[begin:end]
+            values = scores.data[begin:end]
+            if len(values) > top_k:
+                best = np.argpartition(-values, top_k)[:top_k]
+                columns, values = columns[best], values[best]
+            for column, value in zip(columns, values):
+                yield start + offset, int(column), int(value)
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import feeds, follow_graph, spam, trending
+from .models import Comment, Follow, Post, TextFingerprint
+
+
+def invalidate_post_detail(post_id):
+    cache.delete(make_template_fragment_key('post_detail', [post_id]))
+
+
+@receiver([post_save, post_delete], sender=Post)
+def post_changed(sender, instance, **kwargs):
+    invalidate_post_detail(instance.pk)
+    feeds.invalidate(instance)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    invalidate_post_detail(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        follow_graph.invalidate(instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follow_graph.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+def post_fingerprint(sender, instance, created, **kwargs):
+    if created:
+        spam.record(TextFingerprint.POST, instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_fingerprint(sender, instance, created, **kwargs):
+    if created:
+        spam.record(TextFingerprint.COMMENT, instance)
+
+
+@receiver(post_save, sender=Post)
+def post_trending(sender, instance, created, **kwargs):
+    if created:
+        trending.record_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_trending(sender, instance, created, **kwargs):
+    if created:
+        trending.record_comment(instance)
@@ -0,0 +1,249 @@
+"""Карта сайта: индекс и gzip-шарды по SITEMAP_SHARD_SIZE URL.
+
+Шард — диапазон id: посты с id от 1 до 50000 попадают в posts-1.xml.gz
+и так далее, поэтому новые посты меняют только последний шард. Для
+каждого шарда одним GROUP BY считается отпечаток (число строк, сумма
+id, последняя дата); шард перезаписывается, только если отпечаток
+отличается от сохранённого в manifest.json. В URL профилей и групп
+входят username и slug, поэтому их отпечаток дополняет md5 пар
+(id, имя) шарда — переименование тоже перестраивает шард.
+"""
+import gzip
+import hashlib
+import json
+import os
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import (Count, ExpressionWrapper, F, IntegerField, Max,
+                              Sum)
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import ArchivedPost, Group, Post, User
+
+MANIFEST_NAME = 'manifest.json'
+INDEX_NAME = 'sitemap.xml'
+ITERATOR_CHUNK_SIZE = 2000
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def shard_of(field, size):
+    return ExpressionWrapper((F(field) - 1) / size,
+                             output_field=IntegerField())
+
+
+def isoformat(value):
+    return value.isoformat() if value else None
+
+
+def in_shard(field, shard, size):
+    """Условие filter() для id из шарда: (shard * size, (shard + 1) * size]."""
+    return {f'{field}__gt': shard * size, f'{field}__lte': (shard + 1) * size}
+
+
+def name_digests(queryset, field, size):
+    """{шард: md5 пар (id, field)} по объектам queryset."""
+    digests = {}
+    names = queryset.order_by('pk').values_list('pk', field)
+    for pk, name in names.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        digests.setdefault((pk - 1) // size, hashlib.md5()).update(
+            f'{pk}:{name}\n'.encode())
+    return {shard: digest.hexdigest() for shard, digest in digests.items()}
+
+
+class Section:
+    """Часть карты сайта: отпечатки шардов и строки (loc, lastmod)."""
+
+    name = None
+
+    def __init__(self, size):
+        self.size = size
+
+    def fingerprints(self):
+        raise NotImplementedError
+
+    def rows(self, shard):
+        raise NotImplementedError
+
+
+class PostSection(Section):
+    name = 'posts'
+    model = Post
+
+    def fingerprints(self):
+        shards = self.model.objects.annotate(
+            shard=shard_of('pk', self.size)
+        ).values('shard').annotate(
+            count=Count('pk'), pk_sum=Sum('pk')
+        ).order_by('shard')
+        return {row['shard']: [row['count'], row['pk_sum']]
+                for row in shards}
+
+    def rows(self, shard):
+        posts = self.model.objects.filter(
+            **in_shard('pk', shard, self.size)
+        ).order_by('pk').values_list('pk', 'pub_date')
+        for pk, pub_date in posts.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+            yield reverse('posts:post_detail', args=[pk]), pub_date
+
+
+class ArchivedPostSection(PostSection):
+    name = 'archive'
+    model = ArchivedPost
+
+
+class ProfileSection(Section):
+    name = 'profiles'
+
+    def fingerprints(self):
+        shards = Post.objects.annotate(
+            shard=shard_of('author_id', self.size)
+        ).values('shard').annotate(
+            count=Count('pk'),
+            authors=Count('author_id', distinct=True),
+            last=Max('pub_date'),
+        ).order_by('shard')
+        names = name_digests(User.objects.filter(
+            pk__in=Post.objects.values('author_id')), 'username', self.size)
+        return {row['shard']: [row['count'], row['authors'],
+                               isoformat(row['last']), names[row['shard']]]
+                for row in shards}
+
+    def rows(self, shard):
+        authors = Post.objects.filter(
+            **in_shard('author_id', shard, self.size)
+        ).values('author_id', 'author__username').annotate(
+            last=Max('pub_date')
+        ).order_by('author_id').values_list('author__username', 'last')
+        for username, last in authors.iterator(
+                chunk_size=ITERATOR_CHUNK_SIZE):
+            yield reverse('posts:profile', args=[username]), last
+
+
+class GroupSection(Section):
+    name = 'groups'
+
+    def fingerprints(self):
+        fingerprints = {
+            row['shard']: [row['count'], row['pk_sum'], 0, None]
+            for row in Group.objects.annotate(
+                shard=shard_of('pk', self.size)
+            ).values('shard').annotate(
+                count=Count('pk'), pk_sum=Sum('pk')
+            ).order_by('shard')
+        }
+        posts = Post.objects.filter(group__isnull=False).annotate(
+            shard=shard_of('group_id', self.size)
+        ).values('shard').annotate(
+            count=Count('pk'), last=Max('pub_date')
+        ).order_by('shard')
+        for row in posts:
+            fingerprints[row['shard']][2:] = [row['count'],
+                                              isoformat(row['last'])]
+        names = name_digests(Group.objects.all(), 'slug', self.size)
+        for shard, fingerprint in fingerprints.items():
+            fingerprint.append(names[shard])
+        return fingerprints
+
+    def rows(self, shard):
+        groups = Group.objects.filter(
+            **in_shard('pk', shard, self.size)
+        ).annotate(last=Max('posts__pub_date')).order_by(
+            'pk').values_list('slug', 'last')
+        for slug, last in groups.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+            yield reverse('posts:group_list', args=[slug]), last
+
+
+SECTIONS = (PostSection, ArchivedPostSection, ProfileSection, GroupSection)
+
+
+def shard_name(section, shard):
+    return f'{section.name}-{shard + 1}.xml.gz'
+
+
+def write_atomic(path, write):
+    temporary = path + '.tmp'
+    write(temporary)
+    os.replace(temporary, path)
+
+
+def write_shard(path, rows, base_url):
+    def write(temporary):
+        with gzip.open(temporary, 'wt', encoding='utf-8') as shard_file:
+            shard_file.write(XML_HEADER)
+            shard_file.write(f'<urlset xmlns="{XMLNS}">\n')
+            for loc, lastmod in rows:
+                shard_file.write(f'<url><loc>{escape(base_url + loc)}</loc>')
+                if lastmod:
+                    shard_file.write(
+                        f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+                shard_file.write('</url>\n')
+            shard_file.write('</urlset>\n')
+    write_atomic(path, write)
+
+
+def write_index(path, manifest, base_url):
+    def write(temporary):
+        with open(temporary, 'w', encoding='utf-8') as index_file:
+            index_file.write(XML_HEADER)
+            index_file.write(f'<sitemapindex xmlns="{XMLNS}">\n')
+            for name, entry in sorted(manifest.items()):
+                loc = escape(f'{base_url}{settings.SITEMAP_URL}{name}')
+                index_file.write(
+                    f'<sitemap><loc>{loc}</loc>'
+                    f'<lastmod>{entry["lastmod"]}</lastmod></sitemap>\n')
+            index_file.write('</sitemapindex>\n')
+    write_atomic(path, write)
+
+
+def write_manifest(path, manifest):
+    def write(temporary):
+        with open(temporary, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+    write_atomic(path, write)
+
+
+def read_manifest(directory):
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as manifest_file:
+        return json.load(manifest_file)
+
+
+def build(directory=None, base_url=None, size=None, force=False):
+    """Перестраивает изменившиеся шарды; возвращает имена записанных."""
+    directory = directory or settings.SITEMAP_ROOT
+    base_url = (base_url or settings.SITEMAP_BASE_URL).rstrip('/')
+    size = size or settings.SITEMAP_SHARD_SIZE
+    os.makedirs(directory, exist_ok=True)
+    old_manifest = read_manifest(directory)
+    manifest, written = {}, []
+    for section_class in SECTIONS:
+        section = section_class(size)
+        for shard, fingerprint in section.fingerprints().items():
+            name = shard_name(section, shard)
+            path = os.path.join(directory, name)
+            previous = old_manifest.get(name)
+            if (not force and previous is not None
+                    and previous['fingerprint'] == fingerprint
+                    and previous['size'] == size
+                    and os.path.exists(path)):
+                manifest[name] = previous
+                continue
+            write_shard(path, section.rows(shard), base_url)
+            manifest[name] = {
+                'fingerprint': fingerprint,
+                'size': size,
+                'lastmod': timezone.now().date().isoformat(),
+            }
+            written.append(name)
+    for name in set(old_manifest) - set(manifest):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            os.remove(path)
+    write_index(os.path.join(directory, INDEX_NAME), manifest, base_url)
+    write_manifest(os.path.join(directory, MANIFEST_NAME), manifest)
+    return written
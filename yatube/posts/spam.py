@@ -0,0 +1,108 @@
+"""Поиск почти одинаковых текстов: SimHash и LSH по полосам.
+
+64-битный SimHash строится по символьным 3-граммам нормализованного
+текста. Хеш делится на BANDS полос; тексты на расстоянии Хэмминга не
+больше MAX_DISTANCE = BANDS - 1 совпадают хотя бы в одной полосе, поэтому
+кандидаты ищутся по индексам (bandN, created) за окно SPAM_WINDOW,
+а точное расстояние считается уже в Python. Тексты короче
+SPAM_MIN_SHINGLES 3-грамм не проверяются.
+"""
+import hashlib
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from core.moderation import normalize
+
+from .models import TextFingerprint
+
+BITS = 64
+BANDS = 6
+MAX_DISTANCE = BANDS - 1
+SHINGLE_SIZE = 3
+WORD = re.compile(r'\w+')
+# Ширины полос: 11, 11, 11, 11, 10, 10 бит.
+BAND_WIDTHS = [BITS // BANDS + (1 if number < BITS % BANDS else 0)
+               for number in range(BANDS)]
+
+
+def shingles(text):
+    words = ' '.join(WORD.findall(normalize(text)))
+    return [words[start:start + SHINGLE_SIZE]
+            for start in range(max(len(words) - SHINGLE_SIZE + 1, 1))]
+
+
+def simhash(text, text_shingles=None):
+    """SimHash как знаковое 64-битное число (для BigIntegerField)."""
+    if text_shingles is None:
+        text_shingles = shingles(text)
+    weights = [0] * BITS
+    for shingle in text_shingles:
+        value = int.from_bytes(
+            hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for bit in range(BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    unsigned = sum(1 << bit for bit in range(BITS) if weights[bit] > 0)
+    return unsigned - (1 << BITS) if unsigned >= 1 << (BITS - 1) else unsigned
+
+
+def bands(fingerprint):
+    unsigned = fingerprint % (1 << BITS)
+    result, shift = [], 0
+    for width in BAND_WIDTHS:
+        result.append(unsigned >> shift & ((1 << width) - 1))
+        shift += width
+    return result
+
+
+def distance(first, second):
+    return bin((first ^ second) % (1 << BITS)).count('1')
+
+
+def near_duplicates(fingerprint, since):
+    """Число недавних отпечатков на расстоянии не больше MAX_DISTANCE."""
+    condition = Q()
+    for number, value in enumerate(bands(fingerprint)):
+        condition |= Q(**{f'band{number}': value})
+    candidates = TextFingerprint.objects.filter(
+        condition, created__gte=since).values_list('simhash', flat=True)
+    return sum(1 for candidate in candidates
+               if distance(candidate, fingerprint) <= MAX_DISTANCE)
+
+
+class Verdict:
+    def __init__(self, fingerprint, matches):
+        self.fingerprint = fingerprint
+        self.matches = matches
+
+    @property
+    def is_spam(self):
+        return self.matches >= settings.SPAM_DUPLICATE_LIMIT
+
+
+def check(text):
+    text_shingles = shingles(text)
+    fingerprint = simhash(text, text_shingles)
+    if len(text_shingles) < settings.SPAM_MIN_SHINGLES:
+        return Verdict(fingerprint, 0)
+    since = timezone.now() - timedelta(seconds=settings.SPAM_WINDOW)
+    return Verdict(fingerprint, near_duplicates(fingerprint, since))
+
+
+def make_fingerprint(kind, object_id, fingerprint, flagged=False,
+                     created=None):
+    return TextFingerprint(
+        kind=kind, object_id=object_id, simhash=fingerprint,
+        flagged=flagged, created=created or timezone.now(),
+        **{f'band{number}': value
+           for number, value in enumerate(bands(fingerprint))})
+
+
+def record(kind, instance):
+    """Сохраняет отпечаток новой записи; спам помечается на проверку."""
+    verdict = getattr(instance, 'spam_verdict', None) or check(instance.text)
+    make_fingerprint(kind, instance.pk, verdict.fingerprint,
+                     flagged=verdict.is_spam).save()
@@ -0,0 +1,23 @@
+from sorl.thumbnail import get_thumbnail
+
+from core.jobs import task
+
+from . import trending
+from .models import Post
+
+# Те же параметры, что у {% thumbnail %} в includes/article.html
+# и posts/post_detail.html.
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+@task('posts.generate_thumbnail')
+def generate_thumbnail(post_id):
+    post = Post.objects.filter(pk=post_id).exclude(image='').first()
+    if post is not None:
+        get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+@task('posts.persist_trending')
+def persist_trending():
+    trending.persist()
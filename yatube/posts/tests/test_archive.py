@@ -0,0 +1,97 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive
+from ..models import ArchivedComment, ArchivedPost, Comment, Group, Post
+from ..views import LAST_POSTS_NUMBER
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.old_posts = [
+            Post.objects.create(author=self.author, group=self.group,
+                                text=f'Старый пост {number}')
+            for number in range(LAST_POSTS_NUMBER)
+        ]
+        self.comment = Comment.objects.create(
+            post=self.old_posts[0], author=self.author, text='Комментарий')
+        Post.objects.filter(pk__in=[post.pk for post in self.old_posts]
+                            ).update(pub_date=timezone.now()
+                                     - timedelta(days=400))
+        self.new_post = Post.objects.create(
+            author=self.author, group=self.group, text='Новый пост')
+
+    def test_archive_moves_old_posts(self):
+        """Старые посты и комментарии переносятся пачками с теми же id."""
+        self.assertEqual(archive.archive(batch_size=3), LAST_POSTS_NUMBER)
+        self.assertEqual(list(Post.objects.all()), [self.new_post])
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.old_posts})
+        self.assertEqual(ArchivedComment.objects.get().pk, self.comment.pk)
+        self.assertEqual(archive.archive(), 0)
+
+    def test_command(self):
+        """Команда archive_posts учитывает --days."""
+        call_command('archive_posts', days=500, stdout=StringIO())
+        self.assertEqual(ArchivedPost.objects.count(), 0)
+        call_command('archive_posts', days=30, stdout=StringIO())
+        self.assertEqual(ArchivedPost.objects.count(), LAST_POSTS_NUMBER)
+
+    def test_post_detail_serves_archived_post(self):
+        """Архивный пост открывается по прежнему id без формы комментария."""
+        archive.archive()
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old_posts[0].pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertContains(response, 'Комментарий')
+        self.assertNotContains(response, 'id="comment-form"')
+        self.assertEqual(self.client.get(
+            reverse('posts:post_detail', args=[0])).status_code, 404)
+
+    def test_feeds_fall_through_to_archive(self):
+        """Первая страница из горячей таблицы, следующая — из архива."""
+        archive.archive()
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.client.get(url).context['page_obj']
+                self.assertEqual(first.paginator.count,
+                                 LAST_POSTS_NUMBER + 1)
+                self.assertEqual(first[0], self.new_post)
+                self.assertIsInstance(first[1], ArchivedPost)
+                last = self.client.get(url, {'page': 2}).context['page_obj']
+                self.assertEqual(len(last), 1)
+                self.assertIsInstance(last[0], ArchivedPost)
+
+    def test_hot_page_does_not_read_archive(self):
+        """Страница внутри горячей таблицы не выбирает архивные строки."""
+        archive.archive()
+        chain = archive.ArchiveChain(
+            Post.objects.all(), ArchivedPost.objects.all(), 'test')
+        chain.count()
+        with self.assertNumQueries(1):
+            self.assertEqual(chain[0:1], [self.new_post])
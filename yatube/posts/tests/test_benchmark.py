@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .. import benchmark, urls
+
+UNLIMITED_RATE = {'user': '1000/s', 'ip': '1000/s'}
+
+
+@override_settings(THROTTLE_RATES={
+    'post_create': UNLIMITED_RATE,
+    'add_comment': UNLIMITED_RATE,
+    'profile_follow': UNLIMITED_RATE,
+})
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_every_posts_url_is_measured(self):
+        """Прогон покрывает все URL posts и не получает ошибок."""
+        dataset = benchmark.generate_dataset(
+            users=20, groups=3, posts=60, follows=40, comments=30)
+        cache.set('live-session', 'kept')
+        results = benchmark.run(dataset, requests_per_url=3)
+        self.assertEqual(cache.get('live-session'), 'kept')
+        self.assertEqual(
+            set(results),
+            {f'posts:{pattern.name}' for pattern in urls.urlpatterns})
+        for url_name, result in results.items():
+            with self.subTest(url_name=url_name):
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+                self.assertTrue(all(int(code) < 400
+                                    for code in result['statuses']))
@@ -0,0 +1,100 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import archive
+from ..models import Comment, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.post = Post.objects.create(
+            author=cls.author, text='С картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'))
+        Post.objects.create(author=cls.author, text='Без картинки')
+        Comment.objects.create(post=cls.post, author=cls.author,
+                               text='Свой комментарий')
+        Comment.objects.create(post=cls.post, author=cls.other,
+                               text='Чужой комментарий')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.url = reverse('posts:profile_export', args=['author'])
+
+    def test_jsonl_export_streams_author_content(self):
+        """Выгрузка отдаётся потоком: посты и комментарии автора."""
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        records = [json.loads(line) for line in b''.join(
+            response.streaming_content).decode().splitlines()]
+        self.assertEqual([record['type'] for record in records],
+                         ['post', 'post', 'comment'])
+        self.assertEqual(records[2]['text'], 'Свой комментарий')
+
+    def test_zip_export_contains_images(self):
+        """ZIP содержит content.jsonl и файлы картинок."""
+        response = self.client.get(self.url, {'format': 'zip'})
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            archive.read('images/' + self.post.image.name), SMALL_GIF)
+        self.assertEqual(
+            len(archive.read('content.jsonl').decode().splitlines()), 3)
+
+    def test_export_includes_archive(self):
+        """Архивные посты, комментарии и картинки тоже выгружаются."""
+        archive.move_batch([self.post.pk])
+        response = self.client.get(self.url, {'format': 'zip'})
+        archive_file = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            archive_file.read('images/' + self.post.image.name), SMALL_GIF)
+        records = [json.loads(line) for line in archive_file.read(
+            'content.jsonl').decode().splitlines()]
+        self.assertEqual([record['type'] for record in records],
+                         ['post', 'post', 'comment'])
+
+    def test_export_forbidden_for_other_users(self):
+        """Чужую выгрузку получить нельзя."""
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_command_writes_file(self):
+        """Команда export_content пишет выгрузку в файл."""
+        path = os.path.join(TEMP_MEDIA_ROOT, 'export.zip')
+        call_command('export_content', 'author', '--zip', '--output', path)
+        with zipfile.ZipFile(path) as archive:
+            self.assertIn('content.jsonl', archive.namelist())
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост в ленте')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_render_posts(self):
+        """RSS и Atom ленты главной, группы и автора содержат пост."""
+        urls = [
+            reverse('posts:index_feed', args=['rss']),
+            reverse('posts:group_feed', args=['group', 'atom']),
+            reverse('posts:profile_feed', args=['author', 'rss']),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Пост в ленте', response.content.decode())
+                self.assertIn('ETag', response)
+
+    def test_unknown_format_and_group(self):
+        """Неизвестный формат или группа — 404."""
+        for url in (reverse('posts:index_feed', args=['json']),
+                    reverse('posts:group_feed', args=['missing', 'rss'])):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_not_modified_without_post_queries(self):
+        """Повторный запрос с ETag получает 304 без запросов к БД."""
+        url = reverse('posts:index_feed', args=['atom'])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_cached_feed_is_not_rendered_twice(self):
+        """Лента рендерится один раз на версию содержимого."""
+        url = reverse('posts:profile_feed', args=['author', 'atom'])
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_new_post_changes_version(self):
+        """Новый пост сбрасывает версию и попадает в ленту."""
+        url = reverse('posts:group_feed', args=['group', 'rss'])
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(author=self.author, group=self.group,
+                            text='Свежий пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Свежий пост', response.content.decode())
+
+    def test_moved_post_leaves_old_group_feed(self):
+        """Перенос поста в другую группу сбрасывает ленту прежней."""
+        other = Group.objects.create(
+            title='Другая', slug='other', description='Описание')
+        post = Post.objects.create(author=self.author, group=self.group,
+                                   text='Переезжающий пост')
+        url = reverse('posts:group_feed', args=['group', 'rss'])
+        etag = self.client.get(url)['ETag']
+        post = Post.objects.get(pk=post.pk)
+        post.group = other
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Переезжающий пост', response.content.decode())
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.core.cache import cache
+from django.urls import reverse
+
+from .. import follow_graph
+from ..models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='follower')
+        cls.authors = [User.objects.create_user(username=f'author{i}')
+                       for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_membership_is_served_from_cache(self):
+        """Проверка подписки после первого запроса не обращается к БД."""
+        Follow.objects.create(user=self.user, author=self.authors[1])
+        self.assertTrue(
+            follow_graph.is_following(self.user.pk, self.authors[1].pk))
+        with self.assertNumQueries(0):
+            self.assertFalse(
+                follow_graph.is_following(self.user.pk, self.authors[0].pk))
+            author_ids = [author.pk for author in self.authors]
+            self.assertEqual(
+                follow_graph.following_many(self.user.pk, author_ids),
+                {self.authors[1].pk})
+
+    def test_signals_reset_cache(self):
+        """Сигналы Follow сбрасывают массив, он перечитывается одним
+        запросом."""
+        follow_graph.get_followees(self.user.pk)
+        follow = Follow.objects.create(user=self.user, author=self.authors[2])
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                list(follow_graph.get_followees(self.user.pk)),
+                sorted([self.authors[0].pk, self.authors[2].pk]))
+        follow.delete()
+        with self.assertNumQueries(1):
+            self.assertFalse(
+                follow_graph.is_following(self.user.pk, self.authors[2].pk))
+
+    def test_views_reset_cache(self):
+        """Подписка через view сразу отражается на странице профиля."""
+        author = self.authors[0]
+        profile_url = reverse('posts:profile',
+                              kwargs={'username': author.username})
+        response = self.authorized_client.get(profile_url)
+        self.assertFalse(response.context['following'])
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': author.username}))
+        response = self.authorized_client.get(profile_url)
+        self.assertTrue(response.context['following'])
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': author.username}))
+        response = self.authorized_client.get(profile_url)
+        self.assertFalse(response.context['following'])
@@ -263,3 +263,30 @@ class CommentCreateFormTests(TestCase):
             follow=True,)
 
         self.assertEqual(Comment.objects.count(), comments_count)
+
+
+class ModerationFormTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='moderated')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_post_with_forbidden_word_is_rejected(self):
+        """Пост с запрещённым словом в любом регистре не создаётся."""
+        response = self.client.post(reverse('posts:post_create'),
+                                    {'text': 'Новый ИНСТАГРАМ пост'})
+        self.assertFormError(response, 'form', 'text',
+                             'Это слово использовать нельзя!')
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_comment_with_forbidden_word_is_rejected(self):
+        """Комментарий с запрещённым словом не сохраняется."""
+        self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Полный oтстoй'})
+        self.assertFalse(Comment.objects.exists())
@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Max
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import archive, feeds, follow_graph
+from ..importer import Importer
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+RECORDS = [
+    {'type': 'post', 'id': 'p1', 'author': 'leo', 'group': 'cats',
+     'text': 'Первый', 'pub_date': '2015-05-01T10:00:00+00:00'},
+    {'type': 'post', 'id': 'p2', 'author': 'ann', 'text': 'Второй'},
+    {'type': 'comment', 'post': 'p1', 'author': 'ann', 'text': 'Ответ'},
+    {'type': 'follow', 'user': 'ann', 'author': 'leo'},
+    {'type': 'post', 'id': 'p3', 'author': 'leo', 'text': 'Третий'},
+    {'type': 'comment', 'post': 'p2', 'author': 'leo', 'text': 'Ещё'},
+    {'type': 'comment', 'post': 'missing', 'author': 'leo', 'text': '?'},
+]
+
+
+class ImporterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'data.jsonl')
+        with open(self.path, 'w', encoding='utf-8') as data:
+            for record in RECORDS:
+                data.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.checkpoint = self.path + '.checkpoint'
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_import_creates_rows_and_references(self):
+        """Импорт создаёт авторов, группы, посты, комментарии и подписки."""
+        User.objects.create_user(username='ann')
+        call_command('import_content', self.path, '--chunk-size', '3',
+                     stdout=StringIO())
+        first = Post.objects.get(text='Первый')
+        self.assertEqual(first.author.username, 'leo')
+        self.assertEqual(first.group, Group.objects.get(slug='cats'))
+        self.assertEqual(first.pub_date.year, 2015)
+        self.assertEqual(first.comments.get().author.username, 'ann')
+        self.assertEqual(Comment.objects.get(text='Ещё').post.text, 'Второй')
+        self.assertTrue(Follow.objects.filter(
+            user__username='ann', author__username='leo').exists())
+        self.assertEqual(User.objects.filter(username='ann').count(), 1)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resume_after_crash(self):
+        """После сбоя импорт продолжается с чекпоинта без дублей."""
+        original = Importer.import_chunk
+        calls = []
+
+        def crash_on_second_chunk(importer, chunk):
+            calls.append(chunk)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+            return original(importer, chunk)
+
+        with mock.patch.object(Importer, 'import_chunk',
+                               crash_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                Importer(self.checkpoint, chunk_size=3).run(self.path)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertTrue(os.path.exists(self.checkpoint))
+
+        counts = Importer(self.checkpoint, chunk_size=100).run(self.path)
+        self.assertEqual(counts['post'], 1)
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(Comment.objects.get(text='Ещё').post.text, 'Второй')
+
+    def test_csv_and_single_cache_invalidation(self):
+        """CSV импортируется, кеш подписок сбрасывается в конце."""
+        ann = User.objects.create_user(username='ann')
+        follow_graph.get_followees(ann.pk)
+        path = os.path.join(self.directory, 'data.csv')
+        with open(path, 'w', encoding='utf-8') as data:
+            data.write('type,id,post,user,author,group,text\n'
+                       'post,p1,,,leo,,Текст\n'
+                       'follow,,,ann,leo,,\n')
+        Importer().run(path)
+        self.assertEqual(Post.objects.get().author.username, 'leo')
+        self.assertTrue(follow_graph.is_following(
+            ann.pk, User.objects.get(username='leo').pk))
+
+    def test_resume_maps_posts_after_skipped_one(self):
+        """Пропущенный пост не сдвигает id постов при продолжении."""
+        records = [
+            {'type': 'post', 'id': 'bad', 'author': 'leo', 'text': ''},
+            {'type': 'post', 'id': 'p1', 'author': 'leo', 'text': 'Первый'},
+            {'type': 'post', 'id': 'p2', 'author': 'leo', 'text': 'Второй'},
+            {'type': 'comment', 'post': 'p2', 'author': 'ann',
+             'text': 'Ответ', 'created': '2016-02-03T10:00:00+00:00'},
+        ]
+        with open(self.path, 'w', encoding='utf-8') as data:
+            for record in records:
+                data.write(json.dumps(record, ensure_ascii=False) + '\n')
+        original = Importer.import_chunk
+
+        def crash_on_second_chunk(importer, chunk):
+            if chunk[0]['type'] == 'comment':
+                raise RuntimeError('сбой')
+            return original(importer, chunk)
+
+        with mock.patch.object(Importer, 'import_chunk',
+                               crash_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                Importer(self.checkpoint, chunk_size=3).run(self.path)
+        Importer(self.checkpoint, chunk_size=3).run(self.path)
+        comment = Comment.objects.get()
+        self.assertEqual(comment.post.text, 'Второй')
+        self.assertEqual(comment.created.year, 2016)
+
+    def test_dates_kept_without_touching_model_fields(self):
+        """Даты из файла сохраняются, auto_now_add модели не меняется."""
+        field = Post._meta.get_field('pub_date')
+        original = Importer.import_chunk
+        flags = []
+
+        def spy(importer, chunk):
+            result = original(importer, chunk)
+            flags.append(field.auto_now_add)
+            return result
+
+        with mock.patch.object(Importer, 'import_chunk', spy):
+            Importer(chunk_size=3).run(self.path)
+        self.assertEqual(set(flags), {True})
+        self.assertEqual(Post.objects.get(text='Первый').pub_date.year, 2015)
+        self.assertEqual(Post.objects.get(text='Второй').pub_date.year,
+                         timezone.now().year)
+        post = Post.objects.create(
+            author=User.objects.get(username='leo'), text='Новый')
+        self.assertGreater(post.pk, Post.objects.exclude(pk=post.pk).aggregate(
+            Max('pk'))['pk__max'])
+
+    def test_import_resets_feed_versions_and_archive_counts(self):
+        """Импорт сбрасывает версии лент авторов, групп и главной,
+        а также счётчики архива."""
+        leo = User.objects.create_user(username='leo')
+        cats = Group.objects.create(title='cats', slug='cats')
+        scopes = ['index', f'author:{leo.pk}', f'group:{cats.pk}']
+        for scope in scopes:
+            feeds.get_version(scope)
+        version = archive.get_version()
+        Importer().run(self.path)
+        for scope in scopes:
+            self.assertIsNone(cache.get(feeds.version_key(scope)))
+        self.assertNotEqual(archive.get_version(), version)
@@ -1,7 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-from ..models import Group, Post, Comment
+from ..models import EXCERPT_LENGTH, Group, Post, Comment
 
 User = get_user_model()
 
@@ -26,6 +26,37 @@ class PostModelTest(TestCase):
         self.assertEqual(post, expected_post)
 
 
+class PostExcerptTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='writer')
+
+    def test_short_text_is_kept(self):
+        """Короткий текст попадает в excerpt целиком."""
+        post = Post.objects.create(author=self.user, text='Короткий пост')
+        self.assertEqual(post.excerpt, 'Короткий пост')
+        self.assertFalse(post.is_truncated)
+
+    def test_long_text_is_cut_by_word(self):
+        """Длинный текст обрезается по границе слова с многоточием."""
+        post = Post.objects.create(author=self.user, text='слово ' * 100)
+        self.assertTrue(post.is_truncated)
+        self.assertLessEqual(len(post.excerpt), EXCERPT_LENGTH + 1)
+        self.assertTrue(post.excerpt.endswith('слово…'))
+
+    def test_excerpt_follows_text(self):
+        """excerpt пересчитывается при save(update_fields=['text'])
+        и заполняется в bulk_create."""
+        post = Post.objects.create(author=self.user, text='Было')
+        post.text = 'Стало'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, 'Стало')
+        Post.objects.bulk_create([Post(author=self.user, text='Пачкой')])
+        self.assertEqual(Post.objects.get(text='Пачкой').excerpt, 'Пачкой')
+
+
 class GroupModelTest(TestCase):
     @classmethod
     def setUpClass(cls):
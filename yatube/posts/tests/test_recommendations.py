@@ -0,0 +1,54 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Follow, FollowSuggestion
+
+User = get_user_model()
+
+
+class FollowSuggestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.friend2 = User.objects.create_user(username='friend2')
+        cls.popular = User.objects.create_user(username='popular')
+        cls.niche = User.objects.create_user(username='niche')
+        follows = (
+            (cls.reader, cls.friend),
+            (cls.reader, cls.friend2),
+            (cls.friend, cls.popular),
+            (cls.friend2, cls.popular),
+            (cls.friend2, cls.niche),
+            (cls.friend2, cls.reader),
+        )
+        for user, author in follows:
+            Follow.objects.create(user=user, author=author)
+
+    def test_command_builds_second_degree_suggestions(self):
+        """Команда считает общих подписчиков без уже известных авторов."""
+        call_command('build_follow_suggestions', stdout=StringIO())
+        suggestions = {
+            suggestion.author: suggestion.score
+            for suggestion in FollowSuggestion.objects.filter(
+                user=self.reader)
+        }
+        self.assertEqual(suggestions, {self.popular: 2, self.niche: 1})
+
+    def test_suggestions_in_follow_index(self):
+        """Рекомендации выводятся на странице подписок одним запросом."""
+        FollowSuggestion.objects.create(
+            user=self.reader, author=self.niche, score=1)
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [suggestion.author for suggestion
+             in response.context['suggestions']],
+            [self.niche])
+        self.assertContains(response, self.niche.username)
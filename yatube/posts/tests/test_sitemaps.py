@@ -0,0 +1,90 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from .. import sitemaps
+from ..models import Group, Post
+
+User = get_user_model()
+
+SHARD_SIZE = 3
+
+
+class SitemapTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        self.posts = [
+            Post.objects.create(author=self.author, group=self.group,
+                                text=f'Пост {number}')
+            for number in range(5)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def build(self):
+        return sitemaps.build(self.directory, 'http://testserver',
+                              SHARD_SIZE)
+
+    def post_shard(self, post):
+        return f'posts-{(post.pk - 1) // SHARD_SIZE + 1}.xml.gz'
+
+    def read(self, name):
+        with gzip.open(os.path.join(self.directory, name), 'rt') as shard:
+            return shard.read()
+
+    def test_shards_cover_posts_profiles_and_groups(self):
+        """Шарды содержат все посты, профили авторов и группы."""
+        self.build()
+        for post in self.posts:
+            self.assertIn(f'/posts/{post.pk}/</loc>',
+                          self.read(self.post_shard(post)))
+        self.assertIn('/profile/author/', self.read(
+            f'profiles-{(self.author.pk - 1) // SHARD_SIZE + 1}.xml.gz'))
+        self.assertIn('/group/group/', self.read(
+            f'groups-{(self.group.pk - 1) // SHARD_SIZE + 1}.xml.gz'))
+        with open(os.path.join(self.directory, 'sitemap.xml')) as index:
+            self.assertIn(self.post_shard(self.posts[-1]), index.read())
+
+    def test_only_changed_shards_are_rebuilt(self):
+        """Повторный запуск без изменений ничего не перезаписывает,
+        новый пост перезаписывает свои шарды."""
+        self.build()
+        self.assertEqual(self.build(), [])
+        post = Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual(self.build(), [
+            self.post_shard(post),
+            f'profiles-{(self.author.pk - 1) // SHARD_SIZE + 1}.xml.gz',
+        ])
+
+    def test_deleted_shard_is_removed(self):
+        """Исчезнувший шард удаляется вместе с файлом."""
+        self.build()
+        last_shard = self.post_shard(self.posts[-1])
+        Post.objects.filter(pk__in=[
+            post.pk for post in self.posts
+            if self.post_shard(post) == last_shard
+        ]).delete()
+        self.build()
+        self.assertFalse(os.path.exists(
+            os.path.join(self.directory, last_shard)))
+
+    def test_renamed_author_and_group_rebuild_shards(self):
+        """Смена username или slug перестраивает шард профилей или групп."""
+        self.build()
+        self.author.username = 'renamed'
+        self.author.save()
+        self.group.slug = 'moved'
+        self.group.save()
+        profiles = f'profiles-{(self.author.pk - 1) // SHARD_SIZE + 1}.xml.gz'
+        groups = f'groups-{(self.group.pk - 1) // SHARD_SIZE + 1}.xml.gz'
+        self.assertEqual(self.build(), [profiles, groups])
+        self.assertIn('/profile/renamed/', self.read(profiles))
+        self.assertIn('/group/moved/', self.read(groups))
@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import spam
+from ..models import Comment, Post, TextFingerprint
+
+User = get_user_model()
+
+SPAM_TEXT = ('Купите лучшие часы со скидкой 90 процентов только сегодня, '
+             'переходите по ссылке и получите подарок, бесплатная доставка')
+NO_THROTTLE = {'user': '10000/min', 'ip': '10000/min'}
+
+
+class SimHashTests(TestCase):
+    def test_variants_are_close_and_other_texts_far(self):
+        """Вариации текста близки по Хэммингу, другой текст — далёк."""
+        fingerprint = spam.simhash(SPAM_TEXT)
+        for variant in (SPAM_TEXT + ' 7',
+                        'Срочно! ' + SPAM_TEXT,
+                        SPAM_TEXT.upper().replace(',', '')):
+            with self.subTest(variant=variant):
+                self.assertLessEqual(
+                    spam.distance(fingerprint, spam.simhash(variant)),
+                    spam.MAX_DISTANCE)
+        self.assertGreater(
+            spam.distance(fingerprint, spam.simhash(
+                'Гуляли в парке с собакой, погода была отличная')),
+            spam.MAX_DISTANCE)
+
+    def test_close_fingerprints_share_a_band(self):
+        """При MAX_DISTANCE отличающихся битах хотя бы одна полоса общая."""
+        fingerprint = spam.simhash(SPAM_TEXT)
+        flipped = fingerprint
+        for bit in (0, 12, 24, 36, 48):
+            flipped ^= 1 << bit
+        self.assertTrue(set(enumerate(spam.bands(fingerprint)))
+                        & set(enumerate(spam.bands(flipped))))
+
+    def test_lookup_is_one_query(self):
+        """Поиск похожих — один запрос по индексам полос."""
+        with self.assertNumQueries(1):
+            spam.check(SPAM_TEXT)
+
+
+@override_settings(SPAM_DUPLICATE_LIMIT=2, THROTTLE_RATES={
+    'post_create': NO_THROTTLE, 'add_comment': NO_THROTTLE,
+    'profile_follow': NO_THROTTLE})
+class IngestTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='spammer')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_posts(self, count):
+        for number in range(count):
+            self.client.post(reverse('posts:post_create'),
+                             {'text': f'{SPAM_TEXT} {number}'})
+
+    def test_repeats_are_flagged_for_review(self):
+        """В режиме review повторы сохраняются с пометкой."""
+        self.create_posts(4)
+        self.assertEqual(Post.objects.count(), 4)
+        self.assertEqual(list(TextFingerprint.objects.order_by(
+            'pk').values_list('flagged', flat=True)),
+            [False, False, True, True])
+
+    @override_settings(SPAM_ACTION='reject')
+    def test_repeats_are_rejected(self):
+        """В режиме reject повторы не сохраняются."""
+        self.create_posts(4)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_backfill_command(self):
+        """Команда досчитывает отпечатки для записей без них."""
+        Post.objects.bulk_create(
+            [Post(author=self.user, text=f'Старый пост {number}')
+             for number in range(3)])
+        call_command('backfill_fingerprints', stdout=StringIO())
+        self.assertEqual(TextFingerprint.objects.filter(
+            kind=TextFingerprint.POST).count(), 3)
+
+    def test_short_common_comments_are_not_flagged(self):
+        """Короткие одинаковые комментарии разных авторов — не спам."""
+        post = Post.objects.create(author=self.user, text='Пост')
+        for number in range(4):
+            self.client.force_login(
+                User.objects.create_user(username=f'reader{number}'))
+            self.client.post(reverse('posts:add_comment', args=[post.pk]),
+                             {'text': 'Спасибо!'})
+        self.assertEqual(Comment.objects.count(), 4)
+        self.assertFalse(TextFingerprint.objects.filter(
+            flagged=True).exists())
+
+    def test_backfill_skips_only_rows_with_fingerprints(self):
+        """Живой отпечаток нового поста не скрывает старые без него."""
+        Post.objects.bulk_create(
+            [Post(author=self.user, text=f'Старый пост {number}')
+             for number in range(3)])
+        self.create_posts(1)
+        call_command('backfill_fingerprints', '--batch-size', '2',
+                     stdout=StringIO())
+        self.assertEqual(
+            set(TextFingerprint.objects.filter(
+                kind=TextFingerprint.POST).values_list('object_id',
+                                                       flat=True)),
+            set(Post.objects.values_list('pk', flat=True)))
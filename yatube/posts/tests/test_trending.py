@@ -0,0 +1,132 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.checks import run_checks
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.jobs import run_pending
+from core.models import Job
+
+from .. import trending
+from ..models import (Comment, Group, Post, TrendingScore,
+                      supports_returning)
+
+User = get_user_model()
+
+POST = TrendingScore.POST
+GROUP = TrendingScore.GROUP
+
+
+class ScoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_scores_decay(self):
+        """Через два периода полураспада вес уменьшается вчетверо."""
+        now = 1_700_000_000
+        old = now - 2 * settings.TRENDING_HALF_LIFE
+        trending.bump(POST, 1, 1, when=now)
+        trending.bump(POST, 2, 3, when=old)
+        trending.bump(POST, 3, 5, when=old)
+        self.assertEqual(trending.top_ids()[POST], [3, 1, 2])
+
+    @override_settings(TRENDING_CAPACITY=2)
+    def test_capacity(self):
+        """Новый объект вытесняет минимальный и наследует его счёт."""
+        for object_id, weight in ((1, 5), (2, 1), (3, 1)):
+            trending.bump(POST, object_id, weight, when=0)
+        self.assertEqual(trending.top_ids()[POST], [1, 3])
+
+    def test_persist_and_load(self):
+        """Сохранённые счета загружаются после очистки кеша."""
+        for object_id, weight in ((1, 1), (2, 3), (3, 2)):
+            trending.bump(POST, object_id, weight)
+        trending.persist()
+        cache.clear()
+        self.assertEqual(TrendingScore.objects.count(), 3)
+        self.assertEqual(trending.top_ids()[POST], [2, 3, 1])
+
+
+class TrendingPageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Популярная группа', slug='hot', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_writes_update_scores(self):
+        """Посты и комментарии поднимают пост и его группу."""
+        quiet = Post.objects.create(author=self.user, text='Тихий пост')
+        discussed = Post.objects.create(
+            author=self.user, group=self.group, text='Обсуждаемый пост')
+        Comment.objects.create(post=discussed, author=self.user, text='Да')
+        top = trending.top_ids()
+        self.assertEqual(top[POST], [discussed.pk, quiet.pk])
+        self.assertEqual(top[GROUP], [self.group.pk])
+        self.assertEqual(
+            Job.objects.filter(task='posts.persist_trending').count(), 1)
+
+    def test_comment_insert_returns_group(self):
+        """Группа поста приходит из INSERT комментария без отдельного
+        запроса."""
+        post = Post.objects.create(
+            author=self.user, group=self.group, text='Обсуждаемый пост')
+        comment = Comment(post_id=post.pk, author=self.user, text='Да')
+        with self.assertNumQueries(2 if supports_returning() else 3):
+            Comment.objects.create_if_post_exists(comment)
+        self.assertEqual(trending.top_ids()[GROUP], [self.group.pk])
+
+    def test_page(self):
+        """Страница выводит популярное и повторно обходится без БД."""
+        post = Post.objects.create(
+            author=self.user, group=self.group, text='Обсуждаемый пост')
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['posts']), [post])
+        self.assertContains(response, 'Популярная группа')
+        with self.assertNumQueries(0):
+            self.client.get(reverse('posts:trending'))
+
+
+class SharedCacheTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def shared_cache(self):
+        return override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': self.directory,
+        }})
+
+    def test_worker_persists_scores(self):
+        """Задача persist_trending сохраняет счета из общего кеша."""
+        user = User.objects.create_user(username='author')
+        with self.shared_cache():
+            post = Post.objects.create(author=user, text='Пост')
+            Job.objects.filter(task='posts.persist_trending').update(
+                run_at=timezone.now())
+            self.assertEqual(run_pending(), 1)
+        self.assertEqual(list(TrendingScore.objects.values_list(
+            'kind', 'object_id')), [(POST, post.pk)])
+
+    def test_deploy_check_requires_shared_cache(self):
+        """check --deploy предупреждает о кеше в памяти процесса."""
+        def warnings():
+            return [message.id for message in run_checks(
+                include_deployment_checks=True)
+                if message.id == 'posts.W001']
+
+        self.assertEqual(warnings(), ['posts.W001'])
+        with self.shared_cache():
+            self.assertEqual(warnings(), [])
@@ -8,8 +8,10 @@ from django import forms
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from ..models import Group, Post, Follow, Comment
+from ..models import Group, Post, Follow, Comment, supports_returning
 
 
 User = get_user_model()
@@ -103,6 +105,26 @@ class PostPagesTest(TestCase):
         self.assertEqual(first_object.author, self.post.author)
         self.assertEqual(first_object.group, self.post.group)
 
+    def test_feeds_render_excerpt_without_text(self):
+        """Ленты выводят начало текста со ссылкой и не читают text."""
+        long_post = Post.objects.create(
+            author=self.user2, group=self.group, text='абзац ' * 200)
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author2'}),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client_follower.get(url)
+                first_object = response.context['page_obj'][0]
+                self.assertEqual(first_object, long_post)
+                self.assertIn('text', first_object.get_deferred_fields())
+                self.assertContains(response, long_post.excerpt)
+                self.assertContains(response, 'читать дальше')
+                self.assertNotContains(response, long_post.text)
+
     def test_group_list_page_show_correct_context(self):
         """Шаблон group_list сформирован с правильным контекстом."""
         response = self.author_client.get(
@@ -240,6 +262,37 @@ class PostPagesTest(TestCase):
         self.assertEqual(page_content, cached_page_content)
         self.assertNotEqual(cached_page_content, cleared_page_content)
 
+    def test_post_detail_has_no_user_data(self):
+        """Страница поста не содержит CSRF-токена и ссылки для автора."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.author_client.get(url)
+        self.assertContains(response, 'name="csrfmiddlewaretoken" value=""')
+        self.assertContains(response, 'id="post-edit-link" hidden')
+
+    def test_post_user_state(self):
+        """Персональные данные страницы поста отдаются отдельно."""
+        url = reverse('posts:post_user_state',
+                      kwargs={'post_id': self.post.pk})
+        author_state = self.author_client.get(url).json()
+        self.assertTrue(author_state['can_edit'])
+        self.assertTrue(author_state['csrf_token'])
+        user_state = self.authorized_client.get(url).json()
+        self.assertTrue(user_state['is_authenticated'])
+        self.assertFalse(user_state['can_edit'])
+        guest_state = self.client.get(url).json()
+        self.assertFalse(guest_state['is_authenticated'])
+
+    def test_post_detail_cache_reset_on_comment(self):
+        """Новый комментарий сразу виден на закешированной странице."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.client.get(url)
+        Comment.objects.create(
+            post=self.post,
+            author=self.user_follower,
+            text='fresh-comment',
+        )
+        self.assertContains(self.client.get(url), 'fresh-comment')
+
     def test_authorized_client_follower_can_subscribe(self):
         """Авторизованный пользователь может подписываться."""
         followers_count = Follow.objects.count()
@@ -266,6 +319,39 @@ class PostPagesTest(TestCase):
         )
         self.assertEqual(Follow.objects.count(), followers_count - 1)
 
+    def test_follow_and_unfollow_take_one_query(self):
+        """Подписка и отписка выполняются одним запросом."""
+        with self.assertNumQueries(1):
+            Follow.objects.follow(self.user, self.user2.username)
+        with self.assertNumQueries(1):
+            Follow.objects.follow(self.user, self.user2.username)
+        self.assertEqual(
+            Follow.objects.filter(user=self.user).count(), 1)
+        with self.assertNumQueries(1):
+            Follow.objects.unfollow(self.user, self.user2.username)
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
+
+    def test_can_not_follow_yourself(self):
+        """Нельзя подписаться на самого себя."""
+        Follow.objects.follow(self.user, self.user.username)
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
+
+    def test_follow_batch(self):
+        """Пакетная подписка и отписка на нескольких авторов."""
+        url = reverse('posts:profile_follow_batch')
+        usernames = [self.user2.username, 'author', self.user.username]
+        response = self.authorized_client.post(
+            url, {'username': usernames})
+        self.assertEqual(response.json(), {'followed': 2})
+        response = self.authorized_client.post(url, {'username': usernames})
+        self.assertEqual(response.json(), {'followed': 0})
+        self.assertEqual(
+            Follow.objects.filter(user=self.user).count(), 2)
+        response = self.authorized_client.post(
+            url, {'username': usernames, 'action': 'unfollow'})
+        self.assertEqual(response.json(), {'unfollowed': 2})
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
+
     def test_new_post_for_follower_and_unfollower(self):
         """Проверка отображения поста у не-/подписчика."""
         new_post = Post.objects.create(
@@ -344,3 +430,71 @@ class PaginatorViewsTest(TestCase):
                     kwargs={'username': self.user2}) + '?page=2')
         self.assertEqual(len(response.context['page_obj']),
                          SECOND_PAGE_POSTS_COUNT)
+
+
+class WritePathQueriesTest(TestCase):
+    """Число запросов записи при прогретом кеше (сессия и пользователь —
+    первые два запроса)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(
+            title='test-group', slug='test-slug',
+            description='test-description')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.post = Post.objects.create(
+            author=self.user, group=self.group, text='Исходный текст')
+
+    def test_post_create_queries(self):
+        """Создание: проверка на спам, группа, INSERT поста и отпечатка."""
+        url = reverse('posts:post_create')
+        data = {'text': 'Новый пост о прогулке по вечернему городу',
+                'group': self.group.pk}
+        self.client.post(url, data)
+        with self.assertNumQueries(7):
+            response = self.client.post(url, data)
+        self.assertRedirects(
+            response, reverse('posts:profile', args=[self.user.username]))
+
+    def test_post_edit_updates_changed_fields(self):
+        """Правка пишет только изменённые поля, без изменений — ничего."""
+        url = reverse('posts:post_edit', args=[self.post.pk])
+        data = {'text': 'Новый текст', 'group': self.group.pk}
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, data)
+        self.assertEqual(len(queries), 6)
+        update = queries.captured_queries[-1]['sql']
+        self.assertTrue(update.startswith('UPDATE'))
+        self.assertIn('"text"', update)
+        self.assertIn('"excerpt"', update)
+        self.assertNotIn('"image"', update)
+        self.assertNotIn('"group_id"', update)
+        with self.assertNumQueries(5):
+            self.client.post(url, data)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.excerpt, 'Новый текст')
+
+    def test_add_comment_queries(self):
+        """Комментарий вставляется одним INSERT ... SELECT по post_id."""
+        url = reverse('posts:add_comment', args=[self.post.pk])
+        self.client.post(url, {'text': 'Первый комментарий к посту'})
+        with self.assertNumQueries(5 if supports_returning() else 6):
+            response = self.client.post(
+                url, {'text': 'Второй комментарий к посту'})
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=[self.post.pk]))
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_add_comment_to_missing_post(self):
+        """Комментарий к несуществующему посту — 404 без вставки."""
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk + 1]),
+            {'text': 'Мимо'})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Comment.objects.exists())
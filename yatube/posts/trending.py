@@ -0,0 +1,169 @@
+"""Популярное: посты и группы со счётом, затухающим со временем.
+
+Новый пост и новый комментарий добавляют вес к счёту поста и его
+группы; счёт затухает вдвое за TRENDING_HALF_LIFE секунд. Чтобы не
+пересчитывать счета с течением времени, хранится логарифм счёта,
+приведённого к эпохе EPOCH: вклад веса w в момент t равен
+log(w) + λ(t - EPOCH), а вклады складываются через logaddexp. Порядок
+таких счетов совпадает с порядком текущих.
+
+Для каждого типа в кеше лежит словарь не больше TRENDING_CAPACITY
+счетов (Space-Saving: новый объект вытесняет объект с минимальным
+счётом и наследует его счёт, поэтому счёт может быть только завышен).
+Задача posts.persist_trending не чаще раза в TRENDING_PERSIST_INTERVAL
+секунд сохраняет словари в TrendingScore; при пустом кеше словарь
+загружается оттуда. Задачу выполняет run_jobs в своём процессе, поэтому
+кеш должен быть общим для процессов (проверка posts.W001 в check
+--deploy): из LocMemCache обработчик словарей не увидит.
+"""
+import math
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, IntegerField, When
+
+from core.jobs import enqueue
+
+from .models import Comment, Post, TrendingScore
+
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp()
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 1.0
+KINDS = (TrendingScore.POST, TrendingScore.GROUP)
+LOCK_TIMEOUT = 5
+LOCK_ATTEMPTS = 20
+LOCK_DELAY = 0.005
+PERSIST_SCHEDULED_KEY = 'trending:persist_scheduled'
+
+
+def scores_key(kind):
+    return f'trending:{kind}'
+
+
+def decay_rate():
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def logaddexp(first, second):
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def load(kind):
+    return dict(TrendingScore.objects.filter(kind=kind).values_list(
+        'object_id', 'score')[:settings.TRENDING_CAPACITY])
+
+
+def get_scores(kind):
+    scores = cache.get(scores_key(kind))
+    if scores is None:
+        scores = load(kind)
+        cache.add(scores_key(kind), scores, None)
+    return scores
+
+
+@contextmanager
+def locked(kind):
+    """Короткая блокировка словаря в кеше.
+
+    Если блокировку не удалось взять за LOCK_ATTEMPTS попыток, обновление
+    идёт без неё: в худшем случае теряется одновременный вклад.
+    """
+    key = f'{scores_key(kind)}:lock'
+    acquired = False
+    for _ in range(LOCK_ATTEMPTS):
+        acquired = cache.add(key, 1, LOCK_TIMEOUT)
+        if acquired:
+            break
+        time.sleep(LOCK_DELAY)
+    try:
+        yield
+    finally:
+        if acquired:
+            cache.delete(key)
+
+
+def bump(kind, object_id, weight, when=None):
+    when = time.time() if when is None else when
+    added = math.log(weight) + decay_rate() * (when - EPOCH)
+    with locked(kind):
+        scores = get_scores(kind)
+        if object_id in scores:
+            added = logaddexp(scores[object_id], added)
+        elif len(scores) >= settings.TRENDING_CAPACITY:
+            evicted = min(scores, key=scores.get)
+            added = logaddexp(scores.pop(evicted), added)
+        scores[object_id] = added
+        cache.set(scores_key(kind), scores, None)
+
+
+def schedule_persist():
+    if cache.add(PERSIST_SCHEDULED_KEY, 1,
+                 settings.TRENDING_PERSIST_INTERVAL):
+        enqueue('posts.persist_trending',
+                delay=settings.TRENDING_PERSIST_INTERVAL)
+
+
+def record(post_id, group_id, weight):
+    bump(TrendingScore.POST, post_id, weight)
+    if group_id is not None:
+        bump(TrendingScore.GROUP, group_id, weight)
+    schedule_persist()
+
+
+def record_post(post):
+    record(post.pk, post.group_id, POST_WEIGHT)
+
+
+def record_comment(comment):
+    """Учитывает комментарий; group_id поста читает, только если его
+    не вернул INSERT и пост не загружен."""
+    if hasattr(comment, 'post_group_id'):
+        group_id = comment.post_group_id
+    elif Comment.post.is_cached(comment):
+        group_id = comment.post.group_id
+    else:
+        group_id = Post.objects.filter(pk=comment.post_id).values_list(
+            'group_id', flat=True).first()
+    record(comment.post_id, group_id, COMMENT_WEIGHT)
+
+
+def persist():
+    """Заменяет сохранённые счета содержимым кеша."""
+    for kind in KINDS:
+        scores = cache.get(scores_key(kind))
+        if scores is None:
+            continue
+        with transaction.atomic():
+            TrendingScore.objects.filter(kind=kind).delete()
+            TrendingScore.objects.bulk_create(
+                TrendingScore(kind=kind, object_id=object_id, score=score)
+                for object_id, score in scores.items())
+
+
+def top_ids(limit=None):
+    """{тип: id по убыванию счёта} — одно чтение из кеша на оба типа."""
+    limit = limit or settings.TRENDING_SIZE
+    keys = {kind: scores_key(kind) for kind in KINDS}
+    cached = cache.get_many(list(keys.values()))
+    result = {}
+    for kind, key in keys.items():
+        scores = cached.get(key)
+        if scores is None:
+            scores = get_scores(kind)
+        result[kind] = sorted(scores, key=scores.get, reverse=True)[:limit]
+    return result
+
+
+def in_order(queryset, ids):
+    """Объекты queryset с pk из ids в порядке ids."""
+    if not ids:
+        return queryset.none()
+    return queryset.filter(pk__in=ids).order_by(Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    ))
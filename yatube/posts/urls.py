@@ -1,25 +1,37 @@
 # posts/urls.py
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('feed/<slug:feed_format>/', feeds.index_feed, name='index_feed'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/feed/<slug:feed_format>/', feeds.group_feed,
+         name='group_feed'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('profile/<str:username>/feed/<slug:feed_format>/',
+         feeds.profile_feed, name='profile_feed'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('posts/<int:post_id>/state/', views.post_user_state,
+         name='post_user_state'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
+    path('trending/', views.trending_index, name='trending'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/batch/', views.profile_follow_batch,
+         name='profile_follow_batch'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
         name='profile_follow'
     ),
+    path('profile/<str:username>/export/', views.profile_export,
+         name='profile_export'),
     path(
         'profile/<str:username>/unfollow/',
         views.profile_unfollow,
@@ -1,12 +1,24 @@
 from django.core.paginator import Paginator
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_POST
 
-from .models import Post, Group, Follow, User
+from core.jobs import enqueue
+from core.throttling import throttle
+
+from . import archive, export, follow_graph, trending
+from .models import (ArchivedPost, Comment, Post, Group, Follow,
+                     FollowSuggestion, TrendingScore, User)
 from .forms import PostForm, CommentForm
 
 
 LAST_POSTS_NUMBER = 10
+FOLLOW_BATCH_MAX_AUTHORS = 1000
+SUGGESTIONS_NUMBER = 5
 
 
 def paginator(request, post_list, LAST_POSTS_NUMBER):
@@ -16,8 +28,17 @@ def paginator(request, post_list, LAST_POSTS_NUMBER):
     return page_obj
 
 
+def follow_suggestions(user):
+    if not user.is_authenticated:
+        return FollowSuggestion.objects.none()
+    return user.follow_suggestions.select_related(
+        'author')[:SUGGESTIONS_NUMBER]
+
+
 def index(request):
-    post_list = Post.objects.all()
+    post_list = archive.ArchiveChain(
+        Post.objects.defer('text'), ArchivedPost.objects.defer('text'),
+        'index')
     page_obj = paginator(request, post_list, LAST_POSTS_NUMBER)
     context = {
         'page_obj': page_obj,
@@ -27,7 +48,9 @@ def index(request):
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    post_list = archive.ArchiveChain(
+        group.posts.defer('text'), group.archived_posts.defer('text'),
+        f'group:{group.pk}')
     page_obj = paginator(request, post_list, LAST_POSTS_NUMBER)
     context = {
         'group': group,
@@ -38,52 +61,74 @@ def group_posts(request, slug):
 
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
+    post_list = archive.ArchiveChain(
+        author.posts.defer('text'), author.archived_posts.defer('text'),
+        f'author:{author.pk}')
     page_obj = paginator(request, post_list, LAST_POSTS_NUMBER)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author=author)
+    following = (request.user.is_authenticated
+                 and follow_graph.is_following(request.user.pk, author.pk))
     context = {
         'page_obj': page_obj,
         'author': author,
         'following': following,
+        'suggestions': follow_suggestions(request.user),
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = archive.get_post(post_id)
     comments = post.comments.all()
     form = CommentForm()
     context = {
         'post': post,
+        'archived': post.archived,
         'comments': comments,
         'form': form,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@never_cache
+def post_user_state(request, post_id):
+    if not request.user.is_authenticated:
+        return JsonResponse({'is_authenticated': False, 'can_edit': False})
+    can_edit = Post.objects.filter(pk=post_id, author=request.user).exists()
+    return JsonResponse({
+        'is_authenticated': True,
+        'can_edit': can_edit,
+        'csrf_token': get_token(request),
+    })
+
+
 @login_required
+@throttle('post_create', methods=('POST',))
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
-        return redirect('posts:profile', username=post.author.username)
+        if post.image:
+            enqueue('posts.generate_thumbnail', post_id=post.pk)
+        return redirect('posts:profile', username=request.user.username)
     return render(request, 'posts/create_post.html', {'form': form})
 
 
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
-    if request.user != post.author:
+    if post.author_id != request.user.pk:
         return redirect('posts:post_detail', post_id=post.id)
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
         instance=post)
     if form.is_valid():
-        form.save()
+        if form.changed_data:
+            form.save(commit=False).save(update_fields=form.changed_data)
+        if 'image' in form.changed_data and post.image:
+            enqueue('posts.generate_thumbnail', post_id=post.pk)
         return redirect('posts:post_detail', post_id=post.id)
     is_edit = True
     return render(request, 'posts/create_post.html', {'form': form,
@@ -91,39 +136,88 @@ def post_edit(request, post_id):
 
 
 @login_required
+@throttle('add_comment', methods=('POST',))
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
-        comment.post = post
-        comment.save()
+        comment.post_id = post_id
+        if not Comment.objects.create_if_post_exists(comment):
+            raise Http404
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def trending_index(request):
+    top = trending.top_ids()
+    post_ids, group_ids = top[TrendingScore.POST], top[TrendingScore.GROUP]
+    context = {
+        'post_ids': post_ids,
+        'group_ids': group_ids,
+        'posts': trending.in_order(
+            Post.objects.select_related('author', 'group').defer('text'),
+            post_ids),
+        'groups': trending.in_order(Group.objects.all(), group_ids),
+    }
+    return render(request, 'posts/trending.html', context)
+
+
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = archive.ArchiveChain(
+        Post.objects.filter(
+            author__following__user=request.user).defer('text'),
+        ArchivedPost.objects.filter(
+            author__following__user=request.user).defer('text'))
     page_obj = paginator(request, post_list, LAST_POSTS_NUMBER)
     context = {
         'page_obj': page_obj,
+        'suggestions': follow_suggestions(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@throttle('profile_follow')
 def profile_follow(request, username):
-    user = request.user
-    author = get_object_or_404(User, username=username)
-    if author != user:
-        Follow.objects.get_or_create(user=user, author=author)
-    return redirect('posts:profile', username=author)
+    if Follow.objects.follow(request.user, username):
+        follow_graph.invalidate(request.user.pk)
+    return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    follow = Follow.objects.filter(user=request.user, author=author)
-    follow.delete()
+    if Follow.objects.unfollow(request.user, username):
+        follow_graph.invalidate(request.user.pk)
     return redirect('posts:profile', username=username)
+
+
+@login_required
+@require_POST
+@throttle('profile_follow')
+def profile_follow_batch(request):
+    usernames = request.POST.getlist('username')[:FOLLOW_BATCH_MAX_AUTHORS]
+    if request.POST.get('action') == 'unfollow':
+        count = Follow.objects.unfollow_many(request.user, usernames)
+        follow_graph.invalidate(request.user.pk)
+        return JsonResponse({'unfollowed': count})
+    count = Follow.objects.follow_many(request.user, usernames)
+    follow_graph.invalidate(request.user.pk)
+    return JsonResponse({'followed': count})
+
+
+@login_required
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        raise PermissionDenied
+    if request.GET.get('format') == 'zip':
+        response = StreamingHttpResponse(
+            export.iter_zip(author), content_type='application/zip')
+        filename = f'{author.username}.zip'
+    else:
+        response = StreamingHttpResponse(
+            export.iter_jsonl(author), content_type='application/x-ndjson')
+        filename = f'{author.username}.jsonl'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -1,7 +1,9 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+from django.template import loader
 
 from django.contrib.auth import get_user_model
 
+from core.jobs import HIGH_PRIORITY, enqueue
 
 User = get_user_model()
 
@@ -10,3 +12,20 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо рендерится в запросе, а отправляется фоновой задачей."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        subject = ''.join(loader.render_to_string(
+            subject_template_name, context).splitlines())
+        html = None
+        if html_email_template_name is not None:
+            html = loader.render_to_string(html_email_template_name, context)
+        enqueue('users.send_email', priority=HIGH_PRIORITY,
+                subject=subject,
+                body=loader.render_to_string(email_template_name, context),
+                from_email=from_email, to=[to_email], html=html)
@@ -32,6 +32,10 @@ ALLOWED_HOSTS = [
     'testserver',
 ]
 
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
 
 # Application definition
 
@@ -50,9 +54,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.LoadSheddingMiddleware',
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.SlowQueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.AnonymousFastPathMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -146,8 +156,98 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Файлы карты сайта пишет команда build_sitemaps; в продакшене
+# SITEMAP_ROOT отдаётся веб-сервером по адресу SITEMAP_URL.
+SITEMAP_URL = '/sitemaps/'
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_BASE_URL = 'http://localhost:8000'
+SITEMAP_SHARD_SIZE = 50000
+
+# LocMemCache живёт в памяти одного процесса и годится для разработки;
+# с отдельным run_jobs нужен общий кеш (см. TRENDING_*).
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# Кеш, который benchmark_posts подставляет вместо default на время прогона.
+BENCHMARK_CACHE = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'benchmark',
+}
+
+ANONYMOUS_FAST_PATH_URL_NAMES = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:index_feed',
+    'posts:group_feed',
+    'posts:profile_feed',
+    'posts:trending',
+]
+ANONYMOUS_CACHE_MAX_AGE = 60
+
+THROTTLE_RATES = {
+    'post_create': {'user': '10/min', 'ip': '60/min'},
+    'add_comment': {'user': '30/min', 'ip': '120/min'},
+    'profile_follow': {'user': '60/min', 'ip': '240/min'},
+}
+
+LOAD_SHEDDING_MAX_IN_FLIGHT = 32
+LOAD_SHEDDING_LATENCY_MS = 1000
+LOAD_SHEDDING_DEEP_PAGE = 5
+LOAD_SHEDDING_BOT_USER_AGENTS = r'bot|crawl|spider|slurp'
+LOAD_SHEDDING_PROTECTED_URL_NAMES = ['posts:post_detail']
+
+SERVER_TIMING_ENABLED = False
+
+METRICS_DIR = None
+
+SLOW_QUERY_LOG_FILE = None
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_REPEAT_THRESHOLD = 10
+
+PROFILING_DIR = None
+PROFILING_SAMPLE_RATE = 0
+PROFILING_MAX_FILES = 100
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+
+PERFORMANCE_BUDGET_FILE = os.path.join(BASE_DIR, 'performance_budgets.json')
+
+JOB_POLL_INTERVAL = 1
+JOB_RETRY_BASE_DELAY = 10
+JOB_RETRY_MAX_DELAY = 60 * 60
+# Задача без отметки heartbeat_at дольше JOB_LOCK_TIMEOUT секунд
+# считается брошенной и возвращается в очередь; обработчики проверяют
+# это раз в JOB_REQUEUE_INTERVAL секунд, а выполняющаяся задача
+# обновляет отметку раз в JOB_HEARTBEAT_INTERVAL секунд.
+JOB_LOCK_TIMEOUT = 10 * 60
+JOB_HEARTBEAT_INTERVAL = 60
+JOB_REQUEUE_INTERVAL = 60
+
+MODERATION_WORDS_FILE = os.path.join(BASE_DIR, 'moderation_words.txt')
+
+# Почти одинаковые тексты: при SPAM_DUPLICATE_LIMIT совпадениях за
+# SPAM_WINDOW секунд запись отклоняется ('reject') или сохраняется
+# с пометкой для модератора ('review'). Тексты короче SPAM_MIN_SHINGLES
+# 3-грамм («Спасибо!») не проверяются: у разных авторов они совпадают
+# законно.
+SPAM_ACTION = 'review'
+SPAM_DUPLICATE_LIMIT = 5
+SPAM_WINDOW = 60 * 60
+SPAM_MIN_SHINGLES = 20
+
+# Популярное: счёт затухает вдвое за TRENDING_HALF_LIFE секунд, в кеше
+# хранится TRENDING_CAPACITY лучших, на странице — TRENDING_SIZE. Счета
+# в TrendingScore сохраняет run_jobs, поэтому в боевом окружении кеш
+# default должен быть общим для процессов (Memcached, Redis).
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_CAPACITY = 200
+TRENDING_SIZE = 20
+TRENDING_PERSIST_INTERVAL = 5 * 60
+
+# Посты старше ARCHIVE_AFTER_DAYS дней переносятся в архив
+# (manage.py archive_posts) пачками по ARCHIVE_BATCH_SIZE.
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_BATCH_SIZE = 1000